@@ -6,6 +6,7 @@ from .auth_handlers import router as auth_router
 from .manager_handlers import router as manager_router
 from .composite_handlers import router as composite_router
 from .task_handlers import router as task_router
+from .search_handlers import router as search_router
 
 
 __all__ = "main_api_router"
@@ -24,6 +25,8 @@ main_api_router.include_router(composite_router, prefix=f'{app_config.api.BASE_A
                                tags=['composite-api-v1'])
 main_api_router.include_router(task_router, prefix=f'{app_config.api.BASE_API_URL}{app_config.api.TASK}',
                                tags=['task-api-v1'])
+main_api_router.include_router(search_router, prefix=f'{app_config.api.BASE_API_URL}{app_config.api.SEARCH}',
+                               tags=['search-api-v1'])
 
 main_api_router.include_router(manager_router, prefix=f'{app_config.api.BASE_API_URL}{app_config.api.ADMIN_PANEL}',
                                tags=['admin-api-v1'])
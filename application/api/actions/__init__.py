@@ -1,4 +1,9 @@
-__all__ = ("check_cookies", "check_user_permissions")
+__all__ = ("check_cookies", "check_user_permissions", "encode_cursor", "decode_cursor", "encode_rank_cursor",
+           "decode_rank_cursor", "ndjson_response",
+           "orjson_response", "not_modified_response", "make_etag", "if_none_match", "expected_version")
 
 from .auth import check_cookies
 from .user import check_user_permissions
+from .pagination import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor
+from .responses import ndjson_response, orjson_response, not_modified_response
+from .etags import make_etag, if_none_match, expected_version
@@ -0,0 +1,38 @@
+import hashlib
+
+from fastapi import Request
+
+from extentions import ERROR_412_PRECONDITION_FAILED
+
+
+def make_etag(version: int, *parts) -> str:
+    """Strong ETag ``"<row version>.<digest of the rest>"``; If-Match only relies on the row version."""
+    if not parts:
+        return f'"{version}"'
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'"{version}.{digest}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the client already holds ``etag`` and can be answered with 304."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def expected_version(request: Request) -> int | None:
+    """Row version from If-Match, ``None`` when absent or ``*`` (last write wins as before).
+
+    If-Match compares strongly, so a weak ``W/`` tag never matches and fails the precondition.
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    if header.strip().startswith("W/"):
+        raise ERROR_412_PRECONDITION_FAILED
+    try:
+        return int(header.strip().strip('"').split(".")[0])
+    except ValueError:
+        raise ERROR_412_PRECONDITION_FAILED
@@ -0,0 +1,33 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from extentions import ERROR_422_UNPROCESSABLE_ENTITY
+
+
+def encode_cursor(created_at: datetime, object_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{object_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, object_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(object_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ERROR_422_UNPROCESSABLE_ENTITY
+
+
+def encode_rank_cursor(rank: float, object_id: UUID) -> str:
+    # repr round-trips the float exactly, so the next page starts right after this row
+    raw = f"{rank!r}|{object_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        rank, object_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(rank), UUID(object_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ERROR_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,24 @@
+from typing import Any, AsyncIterable
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+
+def _forward_cookies(source: Response, target: Response) -> Response:
+    # a returned Response bypasses the injected one, so keep cookies refreshed by check_cookies
+    target.raw_headers.extend(header for header in source.raw_headers if header[0] == b"set-cookie")
+    return target
+
+
+def orjson_response(content: Any, response: Response, etag: str | None = None) -> ORJSONResponse:
+    """Serialise already-dumped content, skipping the response_model re-validation."""
+    headers = {"ETag": etag} if etag else None
+    return _forward_cookies(response, ORJSONResponse(content, headers=headers))
+
+
+def not_modified_response(etag: str, response: Response) -> Response:
+    return _forward_cookies(response, Response(status_code=304, headers={"ETag": etag}))
+
+
+def ndjson_response(lines: AsyncIterable[bytes], response: Response) -> StreamingResponse:
+    return _forward_cookies(response, StreamingResponse(lines, media_type="application/x-ndjson"))
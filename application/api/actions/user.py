@@ -1,8 +1,7 @@
-from application.db.schemas import User
-from application.db.dals import PortalRoles
+from db import User, Principal, PortalRoles
 
 
-def check_user_permissions(target_user: User, current_user: User) -> bool:
+def check_user_permissions(target_user: User, current_user: Principal) -> bool:
     if target_user.user_id != current_user.user_id:
 
         if not {
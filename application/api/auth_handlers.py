@@ -2,52 +2,68 @@ from typing import Any
 
 from fastapi import APIRouter, Response, Request, Depends
 from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
 from starlette import status
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .crud import _sign_up, _verify_identity_number
+from .crud import _sign_up, _verify_identity_number, _revoke_tokens
 from .models import CreateUser, ResponseSignUp, VerifySignUp, ResponseToken
-from application.db import db_helper
-from application.security import create_access_token, create_refresh_token
+from db import db_helper
+from security import create_access_token, create_refresh_token, sign_token
 from .actions.auth import encode_new_access_token
+from extentions import ERROR_422_UNPROCESSABLE_ENTITY
 
 router = APIRouter()
 
 
 @router.post('/registration', response_model=ResponseSignUp)
-async def sign_up(body: CreateUser, session: AsyncSession = Depends(db_helper.session_getter)) -> ResponseSignUp:
+async def sign_up(body: CreateUser, session: AsyncSession = Depends(db_helper.unit_of_work)) -> ResponseSignUp:
     return await _sign_up(body, session=session)
 
 
 @router.post('/registration/verify', status_code=status.HTTP_201_CREATED, response_model=ResponseToken)
 async def verify_registration(body: VerifySignUp,
                               response: Response,
-                              session: AsyncSession = Depends(db_helper.session_getter)) -> dict[str, str | Any]:
-    access_token, refresh_token = await _verify_identity_number(body, session=session)
+                              session: AsyncSession = Depends(db_helper.unit_of_work)) -> dict[str, str | Any]:
+    tokens = await _verify_identity_number(body, session=session)
+    if tokens is None:
+        # returned, not raised, so the unit of work commits the failed attempt
+        return ORJSONResponse({"detail": ERROR_422_UNPROCESSABLE_ENTITY.detail},
+                              status_code=ERROR_422_UNPROCESSABLE_ENTITY.status_code)
+    access_token, refresh_token = tokens
     response.set_cookie(key='xww-access-cookie', value=access_token, httponly=True)
     response.set_cookie(key='xws-security-cookie', value=refresh_token, httponly=True)
     return {"access_token": access_token, "refresh_token": refresh_token}
 
 
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: Request, response: Response,
+                 session: AsyncSession = Depends(db_helper.unit_of_work)) -> None:
+    await _revoke_tokens([request.cookies.get("xww-access-cookie"), request.cookies.get("xws-security-cookie")],
+                         session=session)
+    response.delete_cookie(key='xww-access-cookie')
+    response.delete_cookie(key='xws-security-cookie')
+
+
 """ Test Points """
 
 
 @router.post('/refresh', response_model=ResponseToken, response_model_exclude_none=True)
 async def refresh_access_token(request: Request, response: Response,
-                               session: AsyncSession = Depends(db_helper.session_getter)):
+                               session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
     if not request.cookies.get("xws-security-cookie"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
     refresh_token = request.cookies.get("xws-security-cookie")
-    access_token = await encode_new_access_token(refresh_token=refresh_token, session=session)
+    access_token = await encode_new_access_token(refresh_token=refresh_token, response=response, session=session)
     response.set_cookie(key='xww-access-cookie', value=access_token, httponly=True)
     return {"access_token": access_token}
 
 
 @router.post('/get-token', response_model=ResponseToken)
 async def get_token(user_id, response: Response) -> dict[str, str | Any]:
-    access_token = create_access_token(user_id=user_id)
-    refresh_token = create_refresh_token(user_id=user_id)
+    access_token = await sign_token(create_access_token, user_id)
+    refresh_token = await sign_token(create_refresh_token, user_id)
     response.set_cookie(key='xww-access-cookie', value=access_token, httponly=True)
     response.set_cookie(key='xws-security-cookie', value=refresh_token, httponly=True)
     return {"access_token": access_token, "refresh_token": refresh_token}
@@ -1,12 +1,18 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Request, Response, Depends, status
+from fastapi import APIRouter, Request, Response, Depends, Query, status
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import NewComposite, ShowComposite, PatchComposite, ShowTask, CompositeID
-from .actions import check_cookies
-from .crud import _create_composite, _update_composite, _get_composite, _delete_composite, _close_composite
+from .models import (NewComposite, ShowComposite, PatchComposite, ShowTask, CompositeID, CompositePage,
+                     CompositeSummary, ClosedComposite)
+from .actions import (check_cookies, decode_cursor, orjson_response, not_modified_response, if_none_match,
+                      expected_version)
+from .serializers import dump_composite, dump_task
+from .crud import (_create_composite, _update_composite, _get_composite, _delete_composite, _close_composite,
+                   _list_composites, _get_composite_summaries, _get_composite_etag, _get_archived_composite,
+                   _get_archived_tasks)
+from app_config import app_config
 from db import db_helper
 
 
@@ -18,7 +24,7 @@ router = APIRouter()
 async def create_composite(body: NewComposite,
                            request: Request,
                            response: Response,
-                           session: AsyncSession = Depends(db_helper.session_getter)):
+                           session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     current_user = await check_cookies(request=request, response=response, session=session)
 
@@ -39,26 +45,58 @@ async def create_composite(body: NewComposite,
 async def get_composite(composite_id: UUID,
                         request: Request,
                         response: Response,
-                        session: AsyncSession = Depends(db_helper.session_getter)):
+                        include_archived: bool = False,
+                        session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
 
     await check_cookies(request=request, response=response, session=session)
-    composite = await _get_composite(composite_id=composite_id, session=session)
-    tasks = [ShowTask.model_validate(row, from_attributes=True) for row in composite.tasks]
-
-    return ShowComposite(composite_id=composite.composite_id,
-                         composite_name=composite.composite_name,
-                         composite_description=composite.composite_description,
-                         created_at=composite.created_at,
-                         composite_status=composite.composite_status,
-                         user_id=composite.user_id,
-                         tasks=tasks)
+    if include_archived:
+        # archived composites never change again, so they are served without an ETag round
+        archived = await _get_archived_composite(composite_id=composite_id, session=session)
+        if archived is not None:
+            return orjson_response(dump_composite(archived), response)
+    etag = await _get_composite_etag(composite_id=composite_id, session=session, include_archived=include_archived)
+    if if_none_match(request, etag):
+        return not_modified_response(etag, response)
+    composite = await _get_composite(composite_id=composite_id, session=session, profile="full")
+    content = dump_composite(composite)
+    if include_archived:
+        # a live composite can still have tasks already moved out by the archiver
+        archived_tasks = await _get_archived_tasks(composite_id=composite_id, session=session)
+        content["tasks"].extend(dump_task(task) for task in archived_tasks)
+    return orjson_response(content, response, etag=etag)
+
+
+@router.get('/list', response_model=CompositePage, response_model_exclude_none=True)
+async def list_composites(request: Request,
+                          response: Response,
+                          cursor: str = None,
+                          limit: int = Query(default=app_config.pagination.DEFAULT_PAGE_SIZE, ge=1,
+                                             le=app_config.pagination.MAX_PAGE_SIZE),
+                          session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    after = decode_cursor(cursor) if cursor else None
+    page = await _list_composites(user_id=current_user.user_id, after=after, limit=limit, session=session)
+    return orjson_response(page, response)
+
+
+@router.get('/summary', response_model=list[CompositeSummary])
+async def get_composite_summary(request: Request,
+                                response: Response,
+                                composite_id: UUID = None,
+                                session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    summaries = await _get_composite_summaries(user_id=current_user.user_id, composite_id=composite_id,
+                                               session=session)
+    return orjson_response(summaries, response)
 
 
 @router.delete('/', response_model=CompositeID)
 async def delete_composite(composite_id: UUID,
                            request: Request,
                            response: Response,
-                           session: AsyncSession = Depends(db_helper.session_getter)):
+                           session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     await check_cookies(request=request, response=response, session=session)
     composite = await _delete_composite(composite_id=composite_id, session=session)
@@ -71,14 +109,15 @@ async def patch_composite(composite_id: UUID,
                           body: PatchComposite,
                           request: Request,
                           response: Response,
-                          session: AsyncSession = Depends(db_helper.session_getter)):
+                          session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     await check_cookies(request=request, response=response, session=session)
 
     updated_params = body.dict(exclude_none=True)
 
     updated_composite = await _update_composite(composite_id=composite_id, updated_params=updated_params,
-                                                session=session)
+                                                session=session, profile="full",
+                                                expected_version=expected_version(request))
     tasks = [ShowTask.model_validate(row, from_attributes=True) for row in updated_composite.tasks]
 
     return ShowComposite(composite_id=updated_composite.composite_id,
@@ -90,20 +129,13 @@ async def patch_composite(composite_id: UUID,
                          tasks=tasks)
 
 
-@router.post('/close', response_model=ShowComposite)
+@router.post('/close', response_model=ClosedComposite, response_model_exclude_none=True)
 async def close_composite(composite_id: UUID,
                           request: Request,
                           response: Response,
-                          session: AsyncSession = Depends(db_helper.session_getter)):
+                          cascade: bool = False,
+                          session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     await check_cookies(request=request, response=response, session=session)
-    composite = await _close_composite(composite_id=composite_id, session=session)
-    tasks = [ShowTask.model_validate(row, from_attributes=True) for row in composite.tasks]
-
-    return ShowComposite(composite_id=composite.composite_id,
-                         composite_name=composite.composite_name,
-                         composite_description=composite.composite_description,
-                         created_at=composite.created_at,
-                         composite_status=composite.composite_status,
-                         user_id=composite.user_id,
-                         tasks=tasks)
+    closed = await _close_composite(composite_id=composite_id, session=session, cascade=cascade)
+    return orjson_response(closed, response)
@@ -1,43 +1,68 @@
 import random
+import re
+from functools import partial
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator
+
+import orjson
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from .models import CreateUser, ResponseSignUp, VerifySignUp
-from db import User, DALUser, PortalRoles, DALAuth, DALTask, Composite, TaskLevel
+from starlette.requests import Request
+
+from .models import CreateUser, ResponseSignUp, VerifySignUp, NewTask, BulkTaskResult, BulkTaskResponse
+from .serializers import dump_task, dump_composite
+from .actions.pagination import encode_cursor, encode_rank_cursor
+from .actions.etags import make_etag
+from db import (User, DALUser, PortalRoles, DALTask, Composite, TaskLevel, db_helper, DALRevokedToken,
+                revocation_list, pending_signups, VerificationStatus, DALArchive, CompositeArchive, TaskArchive,
+                principal_cache, after_commit)
+from db.dals import LoadingProfile, KeysetCursor, RankCursor
 from extentions import (ERROR_404_USER_NOT_FOUND,
                         ERROR_404_PAIR_NOT_FOUND,
                         ERROR_422_UNPROCESSABLE_ENTITY,
-                        ERROR_404_COMPOSITE_NOT_FOUND)
-from security import create_access_token, create_refresh_token
+                        ERROR_404_COMPOSITE_NOT_FOUND,
+                        ERROR_409_COMPOSITE_CLOSED,
+                        ERROR_404_TASK_NOT_FOUND,
+                        ERROR_412_PRECONDITION_FAILED)
+from app_config import app_config
+from security import create_access_token, create_refresh_token, sign_token, decode_jwt, TokenError
 
 
 """ USER helpers """
 
 
 async def _delete_user(user_id: UUID, session: AsyncSession):
-    async with session.begin():
-        user_dal = DALUser(session)
-        deleted_user_id = await user_dal.delete_user(user_id)
-        if deleted_user_id is None:
-            raise ERROR_404_USER_NOT_FOUND.detail.format(id=user_id)
-        return deleted_user_id
+    user_dal = DALUser(session)
+    deleted_user_id = await user_dal.delete_user(user_id)
+    if deleted_user_id is None:
+        raise ERROR_404_USER_NOT_FOUND.detail.format(id=user_id)
+    return deleted_user_id
 
 
-async def _get_user(user_id: UUID, session: AsyncSession):
-    async with session.begin():
-        user_dal = DALUser(session)
-        user = await user_dal.get_user(user_id)
-        if user is None:
-            raise ERROR_404_USER_NOT_FOUND.detail.format(id=user_id)
-        return user
+async def _get_user(user_id: UUID, session: AsyncSession, profile: LoadingProfile = "summary"):
+    user_dal = DALUser(session)
+    user = await user_dal.get_user(user_id, profile=profile)
+    if user is None:
+        raise ERROR_404_USER_NOT_FOUND.detail.format(id=user_id)
+    return user
 
 
-async def _update_user(user_id: UUID, updated_params: dict, session: AsyncSession) -> User.user_id:
-    async with session.begin():
-        user_dal = DALUser(session)
-        update_user_id = await user_dal.update_user(user_id, **updated_params)
-        return update_user_id.user_id
+async def _get_user_etag(user_id: UUID, session: AsyncSession) -> str:
+    user_dal = DALUser(session)
+    versions = await user_dal.get_user_version(user_id)
+    if versions is None:
+        raise ERROR_404_USER_NOT_FOUND
+    return make_etag(*versions)
+
+
+async def _update_user(user_id: UUID, updated_params: dict, session: AsyncSession,
+                       expected_version: int | None = None) -> User.user_id:
+    user_dal = DALUser(session)
+    update_user_id = await user_dal.update_user(user_id, expected_version=expected_version, **updated_params)
+    if update_user_id is None:
+        raise ERROR_412_PRECONDITION_FAILED if expected_version is not None else ERROR_404_USER_NOT_FOUND
+    return update_user_id.user_id
 
 
 """ AUTH helpers """
@@ -50,31 +75,47 @@ async def _add_new_user(phone_number: str, first_name: str, last_name: str, sess
 
 
 async def _sign_up(body: CreateUser, session: AsyncSession) -> ResponseSignUp:
-    async with session.begin():
-        identity_number = random.randint(10_000, 99_999)
-        auth_dal = DALAuth(session)
-        pair_id = await auth_dal.add_new_pair(phone_number=body.phone_number,
-                                              first_name=body.first_name,
-                                              last_name=body.last_name,
-                                              identity_number=identity_number)
-        return ResponseSignUp(pair_id=pair_id)
-
-
-async def _verify_identity_number(body: VerifySignUp, session: AsyncSession) -> tuple[str, str]:
-    async with session.begin():
-        auth_dal = DALAuth(session)
-        check_pair = await auth_dal.get_identity_number(pair_id=body.pair_id)
-        if check_pair is None:
-            raise ERROR_404_PAIR_NOT_FOUND
-        if check_pair.identity_number != body.identity_number:
-            raise ERROR_422_UNPROCESSABLE_ENTITY
-
-        user = await _add_new_user(phone_number=check_pair.phone_number, first_name=check_pair.first_name,
-                                   last_name=check_pair.last_name,
-                                   session=session)
-        access_token = create_access_token(user_id=user.user_id)
-        refresh_token = create_refresh_token(user_id=user.user_id)
-        return access_token, refresh_token
+    identity_number = random.randint(10_000, 99_999)
+    pair_id = await pending_signups.add(session,
+                                        phone_number=body.phone_number,
+                                        first_name=body.first_name,
+                                        last_name=body.last_name,
+                                        identity_number=identity_number)
+    return ResponseSignUp(pair_id=pair_id)
+
+
+async def _verify_identity_number(body: VerifySignUp, session: AsyncSession) -> tuple[str, str] | None:
+    """``None`` for a wrong number: answer 422 without raising, raising would roll back the counted attempt."""
+    verification, check_pair = await pending_signups.consume(session, pair_id=body.pair_id,
+                                                             identity_number=body.identity_number)
+    if verification is VerificationStatus.missing:
+        raise ERROR_404_PAIR_NOT_FOUND
+    if verification is VerificationStatus.mismatch:
+        return None
+
+    user = await _add_new_user(phone_number=check_pair.phone_number, first_name=check_pair.first_name,
+                               last_name=check_pair.last_name,
+                               session=session)
+    access_token = await sign_token(create_access_token, user.user_id)
+    refresh_token = await sign_token(create_refresh_token, user.user_id)
+    return access_token, refresh_token
+
+
+async def _revoke_tokens(tokens: list[str | None], session: AsyncSession) -> None:
+    revoked = {}
+    for token in tokens:
+        if not token:
+            continue
+        try:
+            payload = decode_jwt(token)
+        except TokenError:
+            # expired or forged tokens are rejected anyway
+            continue
+        revoked[UUID(payload["jti"])] = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        after_commit(session, partial(principal_cache.invalidate, payload["sub"]))
+    await DALRevokedToken(session).revoke(revoked)
+    for jti, expires_at in revoked.items():
+        after_commit(session, partial(revocation_list.add, jti, expires_at))
 
 
 """ COMPOSITES & TASKS """
@@ -82,39 +123,93 @@ async def _verify_identity_number(body: VerifySignUp, session: AsyncSession) ->
 
 async def _create_composite(composite_name: str, composite_description: str,
                             for_user_id: UUID, session: AsyncSession) -> Composite:
-    async with session.begin():
-        composite_dal = DALTask(db_session=session)
-        return await composite_dal.create_composite(composite_name=composite_name,
-                                                    composite_description=composite_description,
-                                                    for_user_id=for_user_id)
+    composite_dal = DALTask(db_session=session)
+    return await composite_dal.create_composite(composite_name=composite_name,
+                                                composite_description=composite_description,
+                                                for_user_id=for_user_id)
+
+
+async def _get_composite(composite_id: UUID, session: AsyncSession, profile: LoadingProfile = "summary"):
+    composite_dal = DALTask(db_session=session)
+    composite = await composite_dal.get_composite(composite_id=composite_id, profile=profile)
+    if composite is None:
+        raise ERROR_404_COMPOSITE_NOT_FOUND.detail.format(id=composite_id)
+    return composite
+
 
+async def _get_composite_etag(composite_id: UUID, session: AsyncSession, include_archived: bool = False) -> str:
+    composite_dal = DALTask(db_session=session)
+    versions = await composite_dal.get_composite_version(composite_id)
+    if versions is None:
+        raise ERROR_404_COMPOSITE_NOT_FOUND
+    # tasks only reach the archive by leaving ``tasks``, so the live fingerprint covers both;
+    # the marker keeps the two representations from sharing a tag
+    if include_archived:
+        return make_etag(*versions, "archived")
+    return make_etag(*versions)
 
-async def _get_composite(composite_id: UUID, session: AsyncSession):
-    async with session.begin():
-        composite_dal = DALTask(db_session=session)
-        composite = await composite_dal.get_composite(composite_id=composite_id)
-        if composite is None:
-            raise ERROR_404_COMPOSITE_NOT_FOUND.detail.format(id=composite_id)
-        return composite
+
+async def _get_archived_tasks(composite_id: UUID, session: AsyncSession) -> list[TaskArchive]:
+    archive_dal = DALArchive(db_session=session)
+    return await archive_dal.get_archived_tasks(composite_id=composite_id)
+
+
+async def _get_archived_composite(composite_id: UUID, session: AsyncSession) -> CompositeArchive | None:
+    archive_dal = DALArchive(db_session=session)
+    return await archive_dal.get_archived_composite(composite_id=composite_id)
+
+
+def _page(items: list[dict[str, Any]], next_cursor: str | None) -> dict[str, Any]:
+    page = {"items": items}
+    if next_cursor is not None:
+        page["next_cursor"] = next_cursor
+    return page
+
+
+async def _list_composites(user_id: UUID, after: KeysetCursor | None, limit: int,
+                           session: AsyncSession) -> dict[str, Any]:
+    composite_dal = DALTask(db_session=session)
+    composites = await composite_dal.list_composites(user_id=user_id, after=after, limit=limit + 1)
+    next_cursor = None
+    if len(composites) > limit:
+        composites = composites[:limit]
+        next_cursor = encode_cursor(composites[-1].created_at, composites[-1].composite_id)
+    return _page([dump_composite(row, with_tasks=False, exclude_none=True) for row in composites], next_cursor)
+
+
+async def _get_composite_summaries(user_id: UUID, composite_id: UUID | None,
+                                   session: AsyncSession) -> list[dict[str, Any]]:
+    composite_dal = DALTask(db_session=session)
+    summaries = await composite_dal.get_composite_summaries(user_id=user_id, composite_id=composite_id)
+    return [row._asdict() for row in summaries]
 
 
 async def _delete_composite(composite_id: UUID, session: AsyncSession):
-    async with session.begin():
-        composite_dal = DALTask(db_session=session)
-        return await composite_dal.delete_composite(composite_id=composite_id)
+    composite_dal = DALTask(db_session=session)
+    return await composite_dal.delete_composite(composite_id=composite_id)
 
 
-async def _close_composite(composite_id: UUID, session: AsyncSession):
-    async with session.begin():
-        composite_dal = DALTask(db_session=session)
-        return await composite_dal.close_composite(composite_id=composite_id)
+async def _close_composite(composite_id: UUID, session: AsyncSession, cascade: bool = False) -> dict[str, Any]:
+    composite_dal = DALTask(db_session=session)
+    composite, closed_tasks = await composite_dal.close_composite(composite_id=composite_id, cascade=cascade)
+    if composite is None:
+        # only the failure path pays for telling "missing" from "closed already"
+        if await composite_dal.get_composite_version(composite_id) is None:
+            raise ERROR_404_COMPOSITE_NOT_FOUND
+        raise ERROR_409_COMPOSITE_CLOSED
+    return {**dump_composite(composite, with_tasks=False, exclude_none=True), "closed_tasks": closed_tasks,
+            "open_count": composite.open_count, "done_count": composite.done_count}
 
 
-async def _update_composite(composite_id: UUID, updated_params: dict, session: AsyncSession) -> Composite:
-    async with session.begin():
-        composite_dal = DALTask(db_session=session)
-        updated_composite = await composite_dal.update_composites(composite_id=composite_id, **updated_params)
-        return updated_composite
+async def _update_composite(composite_id: UUID, updated_params: dict, session: AsyncSession,
+                            profile: LoadingProfile = "summary", expected_version: int | None = None) -> Composite:
+    composite_dal = DALTask(db_session=session)
+    updated_composite = await composite_dal.update_composites(composite_id=composite_id, profile=profile,
+                                                              expected_version=expected_version,
+                                                              **updated_params)
+    if updated_composite is None:
+        raise ERROR_412_PRECONDITION_FAILED if expected_version is not None else ERROR_404_COMPOSITE_NOT_FOUND
+    return updated_composite
 
 
 async def _create_task(task_description: str,
@@ -122,36 +217,148 @@ async def _create_task(task_description: str,
                        composite_id: UUID | None,
                        user_id: str | None,
                        session: AsyncSession):
-    async with session.begin():
-        task_dal = DALTask(db_session=session)
-        return await task_dal.create_task(task_description=task_description,
-                                          user_id=user_id,
-                                          task_level=task_level,
-                                          composite_id=composite_id)
+    task_dal = DALTask(db_session=session)
+    return await task_dal.create_task(task_description=task_description,
+                                      user_id=user_id,
+                                      task_level=task_level,
+                                      composite_id=composite_id)
 
 
 async def _get_task(composite_id: UUID | None, user_id: UUID | None, session: AsyncSession):
-    async with session.begin():
-        task_dal = DALTask(db_session=session)
-        return await task_dal.get_task(composite_id=composite_id, user_id=user_id)
+    task_dal = DALTask(db_session=session)
+    return await task_dal.get_task(composite_id=composite_id, user_id=user_id)
+
+
+async def _get_task_etag(composite_id: UUID | None, user_id: UUID | None, session: AsyncSession) -> str:
+    task_dal = DALTask(db_session=session)
+    versions = await task_dal.get_task_version(composite_id=composite_id, user_id=user_id)
+    if versions is None:
+        raise ERROR_404_TASK_NOT_FOUND
+    task_id, version = versions
+    return make_etag(version, task_id)
+
+
+async def _list_tasks(user_id: UUID, composite_id: UUID | None, after: KeysetCursor | None, limit: int,
+                      session: AsyncSession, include_archived: bool = False) -> dict[str, Any]:
+    task_dal = DALTask(db_session=session)
+    list_tasks = task_dal.list_tasks_with_archive if include_archived else task_dal.list_tasks
+    tasks = await list_tasks(user_id=user_id, composite_id=composite_id, after=after, limit=limit + 1)
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].task_id)
+    return _page([dump_task(row, exclude_none=True) for row in tasks], next_cursor)
+
+
+async def _stream_tasks(user_id: UUID, composite_id: UUID | None, after: KeysetCursor | None,
+                        batch_size: int, request: Request) -> AsyncIterator[bytes]:
+    # the request-scoped session is closed before a streaming body is sent, so the export owns its own one,
+    # admitted again as it holds a connection for the whole export
+    async with db_helper.admission.admit(request):
+        async with db_helper.read_session_factory()() as session:
+            async with session.begin():
+                task_dal = DALTask(db_session=session)
+                async for task in task_dal.stream_tasks(user_id=user_id, composite_id=composite_id, after=after,
+                                                        batch_size=batch_size):
+                    yield orjson.dumps(dump_task(task, exclude_none=True), option=orjson.OPT_APPEND_NEWLINE)
 
 
 async def _delete_task(task_id: UUID, session: AsyncSession, composite_id: UUID | None = None,
                        user_id: UUID | None = None):
-    async with session.begin():
-        task_dal = DALTask(db_session=session)
-        return await task_dal.delete_task(task_id, composite_id, user_id)
+    task_dal = DALTask(db_session=session)
+    return await task_dal.delete_task(task_id, composite_id, user_id)
 
 
 async def _update_task(task_id: UUID, updated_params: dict, session: AsyncSession, composite_id: UUID | None = None,
-                       user_id: UUID | None = None):
-    async with session.begin():
-        task_dal = DALTask(db_session=session)
-        return await task_dal.update_task(task_id, composite_id=composite_id, user_id=user_id, **updated_params)
+                       user_id: UUID | None = None, expected_version: int | None = None):
+    task_dal = DALTask(db_session=session)
+    task = await task_dal.update_task(task_id, composite_id=composite_id, user_id=user_id,
+                                      expected_version=expected_version, **updated_params)
+    if task is None:
+        raise ERROR_412_PRECONDITION_FAILED if expected_version is not None else ERROR_404_TASK_NOT_FOUND
+    return task
 
 
 async def _close_task(task_id: UUID, session: AsyncSession, composite_id: UUID | None = None,
                       user_id: UUID | None = None):
-    async with session.begin():
-        task_dal = DALTask(db_session=session)
-        return await task_dal.close_task(task_id, composite_id=composite_id, user_id=user_id)
+    task_dal = DALTask(db_session=session)
+    return await task_dal.close_task(task_id, composite_id=composite_id, user_id=user_id)
+
+
+async def _bulk_create_tasks(tasks: list[NewTask], user_id: UUID, session: AsyncSession) -> BulkTaskResponse:
+    task_dal = DALTask(db_session=session)
+    requested_composites = {task.composite_id for task in tasks if task.composite_id}
+    owned_composites = (await task_dal.get_owned_composite_ids(user_id, requested_composites)
+                        if requested_composites else set())
+
+    results: list[BulkTaskResult | None] = [None] * len(tasks)
+    rows, positions = [], []
+    for index, task in enumerate(tasks):
+        if task.composite_id and task.composite_id not in owned_composites:
+            results[index] = BulkTaskResult(index=index, success=False,
+                                            detail=ERROR_404_COMPOSITE_NOT_FOUND.detail.format(
+                                                id=task.composite_id))
+            continue
+        rows.append({"task_description": task.task_description,
+                     "task_level": task.task_level,
+                     "composite_id": task.composite_id,
+                     "user_id": None if task.composite_id else user_id})
+        positions.append(index)
+
+    created = await task_dal.create_tasks(rows)
+    for index, task in zip(positions, created):
+        results[index] = BulkTaskResult(index=index, task_id=task.task_id, success=True)
+    return BulkTaskResponse(results=results)
+
+
+def _bulk_results(task_ids: list[UUID], affected: list[UUID], detail: str) -> BulkTaskResponse:
+    affected = set(affected)
+    return BulkTaskResponse(results=[
+        BulkTaskResult(index=index, task_id=task_id, success=task_id in affected,
+                       detail=None if task_id in affected else detail)
+        for index, task_id in enumerate(task_ids)
+    ])
+
+
+async def _bulk_close_tasks(task_ids: list[UUID], user_id: UUID, session: AsyncSession) -> BulkTaskResponse:
+    task_dal = DALTask(db_session=session)
+    closed = await task_dal.close_tasks(task_ids, user_id=user_id)
+    return _bulk_results(task_ids, closed, detail="Task not found or already closed")
+
+
+async def _bulk_update_tasks(task_ids: list[UUID], updated_params: dict, user_id: UUID,
+                             session: AsyncSession) -> BulkTaskResponse:
+    task_dal = DALTask(db_session=session)
+    updated = await task_dal.update_tasks(task_ids, user_id=user_id, **updated_params)
+    return _bulk_results(task_ids, updated, detail="Task not found")
+
+
+""" SEARCH """
+
+
+_SEARCH_WORD = re.compile(r"\w+")
+
+
+def _prefix_tsquery(query: str) -> str | None:
+    """``buy mil`` -> ``'buy' & 'mil':*``: every word must match, the last one as a prefix for type-ahead."""
+    words = _SEARCH_WORD.findall(query.lower())[:app_config.search.MAX_TERMS]
+    if not words:
+        return None
+    # \w never matches a quote, so quoting each word keeps tsquery operators out of user input
+    terms = [f"'{word}'" for word in words]
+    terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+async def _search(user_id: UUID, query: str, after: RankCursor | None, limit: int,
+                  session: AsyncSession) -> dict[str, Any]:
+    tsquery = _prefix_tsquery(query)
+    if tsquery is None:
+        raise ERROR_422_UNPROCESSABLE_ENTITY
+    task_dal = DALTask(db_session=session)
+    hits = await task_dal.search(user_id=user_id, tsquery=tsquery, after=after, limit=limit + 1)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_rank_cursor(hits[-1].rank, hits[-1].object_id)
+    return _page([hit._asdict() for hit in hits], next_cursor)
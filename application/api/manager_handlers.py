@@ -8,7 +8,7 @@ from extentions import ERROR_401_UNAUTHORIZED, ERROR_403_FORBIDDEN, ERROR_409_CO
 from .actions.auth import get_user_from_token
 from .crud import _get_user, _update_user
 from .models import UserID
-from application.db import db_helper
+from db import db_helper
 
 
 router = APIRouter()
@@ -16,7 +16,7 @@ router = APIRouter()
 
 @router.patch('/privilege', response_model=UserID)
 async def add_admin_privilege(user_id: UUID, request: Request, response: Response,
-                              session: AsyncSession = Depends(db_helper.session_getter)):
+                              session: AsyncSession = Depends(db_helper.unit_of_work)):
     if not request.cookies.get("xww-access-cookie") and not request.cookies.get("xws-security-cookie"):
         raise ERROR_401_UNAUTHORIZED
     access_token = request.cookies.get("xww-access-cookie")
@@ -25,7 +25,7 @@ async def add_admin_privilege(user_id: UUID, request: Request, response: Respons
                                              session=session)
     if not current_user.is_owner:
         raise ERROR_403_FORBIDDEN
-    user_for_promotion = await _get_user(user_id=user_id, session=session)
+    user_for_promotion = await _get_user(user_id=user_id, session=session, profile="auth")
     if user_for_promotion.is_admin:
         raise ERROR_409_CONFLICT
 
@@ -44,7 +44,7 @@ async def add_admin_privilege(user_id: UUID, request: Request, response: Respons
 
 @router.delete('/privilege', response_model=UserID)
 async def revoke_admin_privilege(user_id: UUID, request: Request, response: Response,
-                                 session: AsyncSession = Depends(db_helper.session_getter)):
+                                 session: AsyncSession = Depends(db_helper.unit_of_work)):
     if not request.cookies.get("xww-access-cookie") and not request.cookies.get("xws-security-cookie"):
         raise ERROR_401_UNAUTHORIZED
     access_token = request.cookies.get("xww-access-cookie")
@@ -55,7 +55,7 @@ async def revoke_admin_privilege(user_id: UUID, request: Request, response: Resp
     if not current_user.is_owner:
         raise ERROR_403_FORBIDDEN
 
-    user_for_revoke = await _get_user(user_id=user_id, session=session)
+    user_for_revoke = await _get_user(user_id=user_id, session=session, profile="auth")
 
     if not user_for_revoke.is_admin:
         raise ERROR_409_CONFLICT
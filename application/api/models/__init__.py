@@ -3,9 +3,18 @@ __all__ = (
     "NewComposite",
     "CompositeID",
     "PatchComposite",
+    "CompositePage",
+    "CompositeSummary",
+    "ClosedComposite",
     "ShowTask",
     "NewTask",
     "PatchTask",
+    "TaskPage",
+    "BulkNewTasks",
+    "BulkTaskIDs",
+    "BulkPatchTasks",
+    "BulkTaskResult",
+    "BulkTaskResponse",
     "CreateUser",
     "UserID",
     "ShowUser",
@@ -13,10 +22,15 @@ __all__ = (
     "ResponseSignUp",
     "VerifySignUp",
     "ResponseToken",
-    "ExpiredTokenSignature"
+    "ExpiredTokenSignature",
+    "SearchHit",
+    "SearchPage"
 )
 
-from .composites import ShowComposite, NewComposite, PatchComposite, CompositeID
-from .tasks import ShowTask, NewTask, PatchTask
+from .composites import (ShowComposite, NewComposite, PatchComposite, CompositeID, CompositePage, CompositeSummary,
+                         ClosedComposite)
+from .tasks import (ShowTask, NewTask, PatchTask, TaskPage, BulkNewTasks, BulkTaskIDs, BulkPatchTasks,
+                    BulkTaskResult, BulkTaskResponse)
 from .users import CreateUser, UserID, ShowUser, UpdateUserRequest
 from .auth import ResponseSignUp, VerifySignUp, ResponseToken, ExpiredTokenSignature
+from .search import SearchHit, SearchPage
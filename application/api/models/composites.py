@@ -27,3 +27,24 @@ class PatchComposite(BaseModel):
     composite_name: str | None = None
     composite_description: str | None = None
 
+
+class CompositePage(BaseModel):
+    items: list[ShowComposite]
+    next_cursor: str | None = None
+
+
+class CompositeSummary(CompositeID):
+    composite_name: str
+    composite_status: ActiveObject
+    open_count: int
+    done_count: int
+    free_count: int
+    optimal_count: int
+    urgent_count: int
+
+
+class ClosedComposite(ShowComposite):
+    # tasks closed by this request, and the composite's counters afterwards
+    closed_tasks: int = 0
+    open_count: int
+    done_count: int
@@ -0,0 +1,22 @@
+from uuid import UUID
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+from db import ActiveObject
+
+
+class SearchHit(BaseModel):
+    kind: Literal["task", "composite"]
+    object_id: UUID
+    # task description or composite name
+    title: str
+    status: ActiveObject
+    created_at: datetime
+    rank: float
+
+
+class SearchPage(BaseModel):
+    items: list[SearchHit]
+    next_cursor: str | None = None
@@ -1,8 +1,9 @@
 from uuid import UUID
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from app_config import app_config
 from db import TaskLevel, ActiveObject
 
 
@@ -20,6 +21,34 @@ class ShowTask(NewTask):
     closed_at: datetime | None = None
 
 
+class TaskPage(BaseModel):
+    items: list[ShowTask]
+    next_cursor: str | None = None
+
+
 class PatchTask(BaseModel):
     task_description: str | None = None
     task_level: TaskLevel | None = None
+
+
+class BulkNewTasks(BaseModel):
+    tasks: list[NewTask] = Field(min_length=1, max_length=app_config.bulk.MAX_ITEMS)
+
+
+class BulkTaskIDs(BaseModel):
+    task_ids: list[UUID] = Field(min_length=1, max_length=app_config.bulk.MAX_ITEMS)
+
+
+class BulkPatchTasks(PatchTask, BulkTaskIDs):
+    pass
+
+
+class BulkTaskResult(BaseModel):
+    index: int
+    task_id: UUID | None = None
+    success: bool
+    detail: str | None = None
+
+
+class BulkTaskResponse(BaseModel):
+    results: list[BulkTaskResult]
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Request, Response, Depends, Query
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import SearchPage
+from .actions import check_cookies, decode_rank_cursor, orjson_response
+from .crud import _search
+from app_config import app_config
+from db import db_helper
+
+
+router = APIRouter()
+
+
+@router.get('/', response_model=SearchPage, response_model_exclude_none=True)
+async def search(request: Request,
+                 response: Response,
+                 q: str = Query(min_length=1, max_length=app_config.search.MAX_QUERY_LENGTH),
+                 cursor: str = None,
+                 limit: int = Query(default=app_config.pagination.DEFAULT_PAGE_SIZE, ge=1,
+                                    le=app_config.pagination.MAX_PAGE_SIZE),
+                 session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    after = decode_rank_cursor(cursor) if cursor else None
+    page = await _search(user_id=current_user.user_id, query=q, after=after, limit=limit, session=session)
+    return orjson_response(page, response)
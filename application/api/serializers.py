@@ -0,0 +1,54 @@
+"""Row -> dict dumpers for read endpoints.
+
+They mirror ShowTask / ShowComposite / ShowUser field for field and return plain
+dicts that orjson encodes directly, so rows are not validated into pydantic models
+and then re-validated against response_model.
+
+"""
+from typing import Any
+
+from db import User, Composite, Task
+
+
+def _without_none(data: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def dump_task(task: Task, exclude_none: bool = False) -> dict[str, Any]:
+    data = {
+        "task_description": task.task_description,
+        "task_level": task.task_level,
+        "composite_id": task.composite_id,
+        "task_id": task.task_id,
+        "user_id": task.user_id,
+        "created_at": task.created_at,
+        "task_status": task.task_status,
+        "closed_at": task.closed_at,
+    }
+    return _without_none(data) if exclude_none else data
+
+
+def dump_composite(composite: Composite, with_tasks: bool = True, exclude_none: bool = False) -> dict[str, Any]:
+    data = {
+        "composite_name": composite.composite_name,
+        "composite_description": composite.composite_description,
+        "composite_id": composite.composite_id,
+        "created_at": composite.created_at,
+        "composite_status": composite.composite_status,
+        "user_id": composite.user_id,
+        "tasks": [dump_task(task, exclude_none) for task in composite.tasks] if with_tasks else None,
+    }
+    return _without_none(data) if exclude_none else data
+
+
+def dump_user(user: User) -> dict[str, Any]:
+    return {
+        "user_id": user.user_id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "phone_number": user.phone_number,
+        "email": user.email,
+        "is_active": user.is_active,
+        "composites": [dump_composite(composite) for composite in user.composites],
+        "tasks": [dump_task(task) for task in user.tasks],
+    }
@@ -1,12 +1,17 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Request, Response, Depends, status
+from fastapi import APIRouter, Request, Response, Depends, Query, status
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .crud import _create_task, _get_task, _delete_task, _update_task, _close_task
-from .actions import check_cookies
-from .models import NewTask, ShowTask, PatchTask
+from .crud import (_create_task, _get_task, _delete_task, _update_task, _close_task, _list_tasks, _stream_tasks,
+                   _bulk_create_tasks, _bulk_close_tasks, _bulk_update_tasks, _get_task_etag)
+from .actions import (check_cookies, decode_cursor, ndjson_response, orjson_response, not_modified_response,
+                      if_none_match, expected_version)
+from .serializers import dump_task
+from .models import NewTask, ShowTask, PatchTask, TaskPage, BulkNewTasks, BulkTaskIDs, BulkPatchTasks, BulkTaskResponse
+from app_config import app_config
+from extentions import ERROR_422_UNPROCESSABLE_ENTITY
 from db import db_helper
 
 
@@ -17,7 +22,7 @@ router = APIRouter()
 async def create_task(body: NewTask,
                       request: Request,
                       response: Response,
-                      session: AsyncSession = Depends(db_helper.session_getter)) -> ShowTask:
+                      session: AsyncSession = Depends(db_helper.unit_of_work)) -> ShowTask:
 
     current_user = await check_cookies(request=request, response=response, session=session)
     task = await _create_task(body.task_description, body.task_level, body.composite_id, current_user.user_id, session)
@@ -35,11 +40,36 @@ async def create_task(body: NewTask,
 async def get_task(request: Request,
                    response: Response,
                    composite_id: UUID = None,
-                   session: AsyncSession = Depends(db_helper.session_getter)):
+                   session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
     current_user = await check_cookies(request=request, response=response, session=session)
+    etag = await _get_task_etag(composite_id=composite_id, user_id=current_user.user_id, session=session)
+    if if_none_match(request, etag):
+        return not_modified_response(etag, response)
     task = await _get_task(composite_id=composite_id, user_id=current_user.user_id, session=session)
 
-    return ShowTask.model_validate(task, from_attributes=True)
+    return orjson_response(dump_task(task, exclude_none=True), response, etag=etag)
+
+
+@router.get('/list', response_model=TaskPage, response_model_exclude_none=True)
+async def list_tasks(request: Request,
+                     response: Response,
+                     composite_id: UUID = None,
+                     cursor: str = None,
+                     limit: int = Query(default=app_config.pagination.DEFAULT_PAGE_SIZE, ge=1,
+                                        le=app_config.pagination.MAX_PAGE_SIZE),
+                     stream: bool = False,
+                     include_archived: bool = False,
+                     session: AsyncSession = Depends(db_helper.read_only_unit_of_work)):
+    current_user = await check_cookies(request=request, response=response, session=session)
+    after = decode_cursor(cursor) if cursor else None
+    if stream:
+        lines = _stream_tasks(user_id=current_user.user_id, composite_id=composite_id, after=after,
+                              batch_size=app_config.pagination.STREAM_BATCH_SIZE, request=request)
+        return ndjson_response(lines, response)
+
+    page = await _list_tasks(user_id=current_user.user_id, composite_id=composite_id, after=after, limit=limit,
+                             session=session, include_archived=include_archived)
+    return orjson_response(page, response)
 
 
 @router.delete('/')
@@ -47,7 +77,7 @@ async def delete_task(request: Request,
                       response: Response,
                       task_id: UUID,
                       composite_id: UUID = None,
-                      session: AsyncSession = Depends(db_helper.session_getter)):
+                      session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     current_user = await check_cookies(request=request, response=response, session=session)
     task = await _delete_task(task_id=task_id, session=session, composite_id=composite_id, user_id=current_user.user_id)
@@ -60,11 +90,12 @@ async def patch_task(task_id: UUID,
                      request: Request,
                      response: Response,
                      composite_id: UUID = None,
-                     session: AsyncSession = Depends(db_helper.session_getter)):
+                     session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     current_user = await check_cookies(request=request, response=response, session=session)
     updated_params = body.dict(exclude_none=True)
-    task = await _update_task(task_id, updated_params, session, composite_id=composite_id, user_id=current_user.user_id)
+    task = await _update_task(task_id, updated_params, session, composite_id=composite_id, user_id=current_user.user_id,
+                              expected_version=expected_version(request))
     return ShowTask.model_validate(task, from_attributes=True)
 
 
@@ -73,9 +104,42 @@ async def close_task(task_id: UUID,
                      request: Request,
                      response: Response,
                      composite_id: UUID = None,
-                     session: AsyncSession = Depends(db_helper.session_getter)):
+                     session: AsyncSession = Depends(db_helper.unit_of_work)):
 
     current_user = await check_cookies(request=request, response=response, session=session)
     task = await _close_task(task_id, session, composite_id, current_user.user_id)
 
     return ShowTask.model_validate(task, from_attributes=True)
+
+
+@router.post("/bulk", response_model=BulkTaskResponse, response_model_exclude_none=True)
+async def bulk_create_tasks(body: BulkNewTasks,
+                            request: Request,
+                            response: Response,
+                            session: AsyncSession = Depends(db_helper.unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    return await _bulk_create_tasks(body.tasks, current_user.user_id, session)
+
+
+@router.post("/bulk/close", response_model=BulkTaskResponse, response_model_exclude_none=True)
+async def bulk_close_tasks(body: BulkTaskIDs,
+                           request: Request,
+                           response: Response,
+                           session: AsyncSession = Depends(db_helper.unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    return await _bulk_close_tasks(body.task_ids, current_user.user_id, session)
+
+
+@router.patch("/bulk", response_model=BulkTaskResponse, response_model_exclude_none=True)
+async def bulk_patch_tasks(body: BulkPatchTasks,
+                           request: Request,
+                           response: Response,
+                           session: AsyncSession = Depends(db_helper.unit_of_work)):
+
+    current_user = await check_cookies(request=request, response=response, session=session)
+    updated_params = body.dict(exclude_none=True, exclude={"task_ids"})
+    if updated_params == {}:
+        raise ERROR_422_UNPROCESSABLE_ENTITY
+    return await _bulk_update_tasks(body.task_ids, updated_params, current_user.user_id, session)
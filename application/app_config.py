@@ -14,11 +14,64 @@ class APIv1Settings(BaseModel):
     COMPOSITE: str = "/composite"
     TASK: str = "/task"
     ADMIN_PANEL: str = "/admin"
+    SEARCH: str = "/search"
+
+
+class PaginationSettings(BaseModel):
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    STREAM_BATCH_SIZE: int = 500
+
+
+class SearchSettings(BaseModel):
+    MAX_QUERY_LENGTH: int = 200
+    # words past this are dropped instead of growing the tsquery
+    MAX_TERMS: int = 8
+
+
+class BulkSettings(BaseModel):
+    MAX_ITEMS: int = 1000
+
+
+class RateLimit(BaseModel):
+    # tokens refilled per second and bucket size
+    RATE: float
+    BURST: int
+    # key by client IP even when the request carries a token; for routes that hand tokens out
+    BY_IP: bool = False
+
+
+class RateLimitSettings(BaseModel):
+    ENABLED: bool = True
+    SHARDS: int = 64
+    MAX_BUCKETS: int = 100_000
+    # only behind a proxy that overwrites X-Forwarded-For
+    TRUST_FORWARDED_FOR: bool = False
+    # full request path -> limit per user (or client IP when there is no valid token or BY_IP is set)
+    ROUTES: dict[str, RateLimit] = {
+        "/api/v1/auth/registration": RateLimit(RATE=0.1, BURST=5, BY_IP=True),
+        "/api/v1/auth/registration/verify": RateLimit(RATE=0.2, BURST=5, BY_IP=True),
+        "/api/v1/auth/refresh": RateLimit(RATE=1, BURST=10),
+        "/api/v1/auth/get-token": RateLimit(RATE=1, BURST=5, BY_IP=True),
+    }
+
+
+class DocsSettings(BaseModel):
+    # written by `python main.py openapi` at build time; generated on first request when missing or stale
+    OPENAPI_PATH: str = "openapi.json"
+    # swagger-ui-bundle.js and swagger-ui.css from the swagger-ui-dist package; the CDN is used when missing
+    SWAGGER_ASSETS_DIR: str = "static/swagger"
+    SWAGGER_CDN_URL: str = "https://cdn.staticfile.net/swagger-ui/5.1.0"
 
 
 class AppConfig(BaseSettings):
     run: RunAppSettings = RunAppSettings()
     api: APIv1Settings = APIv1Settings()
+    pagination: PaginationSettings = PaginationSettings()
+    bulk: BulkSettings = BulkSettings()
+    search: SearchSettings = SearchSettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    docs: DocsSettings = DocsSettings()
 
 
 app_config = AppConfig()
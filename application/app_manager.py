@@ -1,36 +1,84 @@
+import asyncio
+import hashlib
 from contextlib import asynccontextmanager
-import sys
-from fastapi import FastAPI, APIRouter
+from pathlib import Path
 
-from fastapi import applications
-from fastapi.openapi.docs import get_swagger_ui_html
+import orjson
+from fastapi import FastAPI, APIRouter
+from fastapi.responses import PlainTextResponse, HTMLResponse
 
 from loguru import logger
 
-from db import db_helper
-
-
-logger.add("file_1.log", colorize=True,
-           format="<yellow>{time:YYYY-MM-DD at HH:mm:ss}</> | {level} | <level>{message}</>")
+from app_config import DocsSettings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    from db import db_helper, revocation_list, pending_signups, archiver
+    from db_config import revocation_config, pending_signup_config, archive_config
+
     # startup
+    db_helper.connect()
+    background = [asyncio.create_task(revocation_list.run(sync_interval=revocation_config.sync_interval,
+                                                          prune_interval=revocation_config.prune_interval)),
+                  asyncio.create_task(pending_signups.run(interval=pending_signup_config.sweep_interval))]
+    if archive_config.enabled:
+        background.append(asyncio.create_task(archiver.run(interval=archive_config.interval)))
     yield
     # shutdown
+    for task in background:
+        task.cancel()
+    # a loop cancelled mid-chunk unwinds its session here, while the engine and the log sink are still up
+    await asyncio.gather(*background, return_exceptions=True)
     logger.error("Движок бызы данных гарантированно закончил последнюю транзакцию и (*остановлен)")
     await db_helper.dispose()
+    app.state.log_sink.stop()
+
+
+# stored in the prebuilt document; a mismatch means it predates the running code
+ROUTES_DIGEST_KEY = "x-routes-digest"
 
 
-def swagger_monkey_patch(*args, **kwargs):
-    return get_swagger_ui_html(
-        *args, **kwargs,
-        swagger_js_url="https://cdn.staticfile.net/swagger-ui/5.1.0/swagger-ui-bundle.min.js",
-        swagger_css_url="https://cdn.staticfile.net/swagger-ui/5.1.0/swagger-ui.min.css")
+def _routes_digest(app: FastAPI) -> str:
+    """Digest of the app version and every documented (path, methods) pair."""
+    routes = sorted((route.path, sorted(route.methods)) for route in app.routes
+                    if getattr(route, "include_in_schema", False))
+    return hashlib.blake2b(repr((app.version, routes)).encode(), digest_size=8).hexdigest()
 
 
-applications.get_swagger_ui_html = swagger_monkey_patch
+def setup_docs(app: FastAPI, settings: DocsSettings) -> None:
+    """Serve the prebuilt OpenAPI document and Swagger UI from local files when they exist."""
+    from fastapi.openapi.docs import get_swagger_ui_html
+    from fastapi.staticfiles import StaticFiles
+
+    openapi_path = Path(settings.OPENAPI_PATH)
+    if openapi_path.is_file():
+        schema = orjson.loads(openapi_path.read_bytes())
+        if schema.get(ROUTES_DIGEST_KEY) == _routes_digest(app):
+            # FastAPI returns a preset schema as is instead of walking every route on the first request
+            app.openapi_schema = schema
+        else:
+            logger.warning("{} was built for other routes or another version, generating the schema instead",
+                           openapi_path)
+
+    assets = Path(settings.SWAGGER_ASSETS_DIR)
+    if (assets / "swagger-ui-bundle.js").is_file():
+        app.mount("/static/swagger", StaticFiles(directory=assets), name="swagger")
+        assets_url = "/static/swagger"
+    else:
+        assets_url = settings.SWAGGER_CDN_URL
+
+    @app.get("/docs", include_in_schema=False)
+    async def swagger_ui_html() -> HTMLResponse:
+        return get_swagger_ui_html(openapi_url=app.openapi_url, title=f"{app.title} - Swagger UI",
+                                   swagger_js_url=f"{assets_url}/swagger-ui-bundle.js",
+                                   swagger_css_url=f"{assets_url}/swagger-ui.css")
+
+
+def write_openapi(app: FastAPI, path: str) -> None:
+    app.openapi_schema = None
+    schema = {**app.openapi(), ROUTES_DIGEST_KEY: _routes_digest(app)}
+    Path(path).write_bytes(orjson.dumps(schema, option=orjson.OPT_INDENT_2))
 
 
 router = APIRouter()
@@ -40,3 +88,8 @@ router = APIRouter()
 async def ping() -> dict:
     return {"Success": "pong"}
 
+
+@router.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    from monitoring import registry
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,20 @@
+"""DAL and crud microbenchmarks against a seeded local Postgres.
+
+Usage (from the ``application`` directory)::
+
+    python -m benchmarks seed
+    python -m benchmarks run --output benchmarks/baselines/main.json
+    python -m benchmarks compare benchmarks/baselines/main.json benchmarks/baselines/branch.json
+    python -m benchmarks plans
+    python -m benchmarks prepared
+    python -m benchmarks partitions --output benchmarks/baselines/unpartitioned.json
+    python -m benchmarks search
+    python -m benchmarks serialize --tasks 500
+    python -m benchmarks tokens
+    python -m benchmarks startup
+
+``partitions`` is meant to be run twice around ``alembic upgrade``, on a dataset
+of tens of millions of tasks (e.g. ``seed --users 200000 --tasks-per-user 100``),
+and the two reports compared with ``compare``.
+
+"""
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from db import db_helper
+from .compare import compare
+from .config import benchmark_config
+from .plans import check_plans
+from .prepared import compare_prepare_modes
+from .partitions import time_partition_cases
+from .search import compare_search
+from .runner import run
+from .serialization import compare_serializers
+from .seed import seed, is_seeded
+from .startup import measure_startup
+from .tokens import token_throughput
+from .cases import load_sample
+
+
+async def _seed(args: argparse.Namespace) -> int:
+    if await is_seeded() and not args.force:
+        print("dataset already seeded, pass --force to add another one")
+        return 0
+    await seed(users=args.users, composites_per_user=args.composites_per_user, tasks_per_user=args.tasks_per_user,
+               auth_pairs=args.auth_pairs, batch_size=benchmark_config.batch_size)
+    return 0
+
+
+def _write_report(report: dict, output: str) -> None:
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    for name, stats in report["results"].items():
+        print(f"{name:<40} p50={stats['p50']:8.3f}ms p95={stats['p95']:8.3f}ms p99={stats['p99']:8.3f}ms")
+
+
+async def _run(args: argparse.Namespace) -> int:
+    sample = await load_sample(benchmark_config.sample_size)
+    report = await run(sample, iterations=args.iterations, warmup=args.warmup, only=args.only)
+    _write_report(report, args.output)
+    return 0
+
+
+async def _partitions(args: argparse.Namespace) -> int:
+    sample = await load_sample(benchmark_config.sample_size)
+    report = await time_partition_cases(sample, iterations=args.iterations, warmup=args.warmup)
+    for partition, rows in report["meta"]["tasks_layout"].items():
+        print(f"{partition:<40} ~{rows} rows")
+    _write_report(report, args.output)
+    return 0
+
+
+async def _plans(args: argparse.Namespace) -> int:
+    problems = await check_plans(await load_sample(benchmark_config.sample_size))
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+async def _prepared(args: argparse.Namespace) -> int:
+    sample = await load_sample(benchmark_config.sample_size)
+    results = await compare_prepare_modes(sample, iterations=args.iterations, warmup=args.warmup)
+    for mode, cases in results.items():
+        for name, stats in cases.items():
+            print(f"{mode:<20} {name:<32} p50={stats['p50']:8.3f}ms p95={stats['p95']:8.3f}ms")
+    return 0
+
+
+async def _search(args: argparse.Namespace) -> int:
+    sample = await load_sample(benchmark_config.sample_size)
+    _write_report(await compare_search(sample, iterations=args.iterations, warmup=args.warmup), args.output)
+    return 0
+
+
+def _serialize(args: argparse.Namespace) -> int:
+    results = compare_serializers(tasks=args.tasks, repeat=args.repeat)
+    for name, cpu_ms in results.items():
+        print(f"{name:<10} {cpu_ms:8.3f}ms CPU per response ({args.tasks} tasks)")
+    print(f"speedup    {results['validated'] / results['direct']:8.2f}x")
+    return 0
+
+
+def _tokens(args: argparse.Namespace) -> int:
+    for codec, results in token_throughput(repeat=args.repeat).items():
+        print(f"{codec:<14} " + " ".join(f"{name}={per_second:10.0f}/s" for name, per_second in results.items()))
+    return 0
+
+
+def _startup(args: argparse.Namespace) -> int:
+    for phase, stats in measure_startup(repeat=args.repeat).items():
+        print(f"{phase:<12} median={stats['median']:8.1f}ms max={stats['max']:8.1f}ms")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    regressions = compare(baseline, current, metric=args.metric, threshold=args.threshold)
+    for regression in regressions:
+        print(regression)
+    return 1 if regressions else 0
+
+
+async def _with_engine(command, args: argparse.Namespace) -> int:
+    try:
+        return await command(args)
+    finally:
+        await db_helper.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="insert the synthetic dataset")
+    seed_parser.add_argument("--users", type=int, default=benchmark_config.users)
+    seed_parser.add_argument("--composites-per-user", type=int, default=benchmark_config.composites_per_user)
+    seed_parser.add_argument("--tasks-per-user", type=int, default=benchmark_config.tasks_per_user)
+    seed_parser.add_argument("--auth-pairs", type=int, default=benchmark_config.auth_pairs)
+    seed_parser.add_argument("--force", action="store_true")
+
+    run_parser = commands.add_parser("run", help="time every case and write a JSON report")
+    run_parser.add_argument("--output", default="benchmarks/baselines/latest.json")
+    run_parser.add_argument("--iterations", type=int, default=benchmark_config.iterations)
+    run_parser.add_argument("--warmup", type=int, default=benchmark_config.warmup)
+    run_parser.add_argument("--only", help="run only cases whose name contains this string")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--metric", default=benchmark_config.regression_metric,
+                                choices=("p50", "p95", "p99", "mean"))
+    compare_parser.add_argument("--threshold", type=float, default=benchmark_config.regression_threshold)
+
+    commands.add_parser("plans", help="fail if a case's statements plan a Seq Scan on the hot tables")
+
+    prepared_parser = commands.add_parser("prepared", help="hot statements under each prepared statement mode")
+    prepared_parser.add_argument("--iterations", type=int, default=benchmark_config.iterations)
+    prepared_parser.add_argument("--warmup", type=int, default=benchmark_config.warmup)
+
+    partitions_parser = commands.add_parser("partitions", help="get_task/close_task before or after partitioning")
+    partitions_parser.add_argument("--output", default="benchmarks/baselines/partitions.json")
+    partitions_parser.add_argument("--iterations", type=int, default=benchmark_config.iterations)
+    partitions_parser.add_argument("--warmup", type=int, default=benchmark_config.warmup)
+
+    search_parser = commands.add_parser("search", help="full-text search against ILIKE on the seeded corpus")
+    search_parser.add_argument("--output", default="benchmarks/baselines/search.json")
+    search_parser.add_argument("--iterations", type=int, default=benchmark_config.iterations)
+    search_parser.add_argument("--warmup", type=int, default=benchmark_config.warmup)
+
+    serialize_parser = commands.add_parser("serialize", help="CPU cost of rendering a composite response")
+    serialize_parser.add_argument("--tasks", type=int, default=500)
+    serialize_parser.add_argument("--repeat", type=int, default=200)
+
+    tokens_parser = commands.add_parser("tokens", help="tokens/sec per JWT backend and algorithm")
+    tokens_parser.add_argument("--repeat", type=int, default=5_000)
+
+    startup_parser = commands.add_parser("startup", help="worker boot time: import, create_app and openapi")
+    startup_parser.add_argument("--repeat", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return _compare(args)
+    if args.command == "serialize":
+        return _serialize(args)
+    if args.command == "tokens":
+        return _tokens(args)
+    if args.command == "startup":
+        return _startup(args)
+    command = {"seed": _seed, "run": _run, "plans": _plans, "prepared": _prepared,
+               "partitions": _partitions, "search": _search}[args.command]
+    return asyncio.run(_with_engine(command, args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
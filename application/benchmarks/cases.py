@@ -0,0 +1,116 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import crud
+from api.models import CreateUser, NewTask
+from db import db_helper, DALUser, DALAuth, DALTask, User, AuthUser, Composite, Task, ActiveObject, TaskLevel
+from .seed import PHONE_PREFIX
+
+
+@dataclass
+class Sample:
+    """Ids picked from the seeded dataset that the cases draw from at random."""
+
+    user_ids: list[UUID]
+    composites: list[tuple[UUID, UUID]]
+    tasks: list[tuple[UUID, UUID]]
+    pair_ids: list[UUID]
+
+    def user(self) -> UUID:
+        return random.choice(self.user_ids)
+
+    def composite(self) -> tuple[UUID, UUID]:
+        return random.choice(self.composites)
+
+    def task(self) -> tuple[UUID, UUID]:
+        return random.choice(self.tasks)
+
+    def pair(self) -> UUID:
+        return random.choice(self.pair_ids)
+
+
+async def load_sample(size: int) -> Sample:
+    async with db_helper.session_factory() as session:
+        user_ids = list(await session.scalars(
+            select(User.user_id).where(User.phone_number.like(f"{PHONE_PREFIX}%")).limit(size)))
+        # active only: crud._close_composite answers a closed one with 409 instead of closing it
+        composites = (await session.execute(
+            select(Composite.composite_id, Composite.user_id)
+            .where(Composite.user_id.in_(user_ids), Composite.composite_status == ActiveObject.active))).all()
+        tasks = (await session.execute(
+            select(Task.task_id, Task.user_id)
+            .where(Task.user_id.in_(user_ids), Task.task_status == ActiveObject.active).limit(size))).all()
+        pair_ids = list(await session.scalars(
+            select(AuthUser.auth_id).where(AuthUser.phone_number.like(f"{PHONE_PREFIX}%")).limit(size)))
+    return Sample(user_ids=user_ids, composites=[tuple(row) for row in composites],
+                  tasks=[tuple(row) for row in tasks], pair_ids=pair_ids)
+
+
+Case = Callable[[AsyncSession, Sample], Awaitable[Any]]
+
+
+def _on_task(sample: Sample, call: Callable[[UUID, UUID], Awaitable[Any]]) -> Awaitable[Any]:
+    task_id, user_id = sample.task()
+    return call(task_id, user_id)
+
+
+CASES: dict[str, Case] = {
+    # DALUser
+    "DALUser.get_user[auth]": lambda s, d: DALUser(s).get_user(d.user(), profile="auth"),
+    "DALUser.get_user[summary]": lambda s, d: DALUser(s).get_user(d.user(), profile="summary"),
+    "DALUser.get_user[full]": lambda s, d: DALUser(s).get_user(d.user(), profile="full"),
+    "DALUser.create_user": lambda s, d: DALUser(s).create_user("bench-new", "Bench", "New", roles=[]),
+    "DALUser.update_user": lambda s, d: DALUser(s).update_user(d.user(), first_name="Updated"),
+    "DALUser.delete_user": lambda s, d: DALUser(s).delete_user(d.user()),
+    # DALAuth
+    "DALAuth.add_new_pair": lambda s, d: DALAuth(s).add_new_pair("bench-new", "Bench", "New", 12345),
+    "DALAuth.get_identity_number": lambda s, d: DALAuth(s).get_identity_number(d.pair()),
+    "DALAuth.consume_pair": lambda s, d: DALAuth(s).consume_pair(d.pair(), identity_number=0, max_attempts=5),
+    # DALTask
+    "DALTask.create_composite": lambda s, d: DALTask(s).create_composite("bench", "bench", d.user()),
+    "DALTask.get_composite[summary]": lambda s, d: DALTask(s).get_composite(d.composite()[0]),
+    "DALTask.get_composite[full]": lambda s, d: DALTask(s).get_composite(d.composite()[0], profile="full"),
+    "DALTask.list_composites": lambda s, d: DALTask(s).list_composites(d.user()),
+    "DALTask.update_composites": lambda s, d: DALTask(s).update_composites(d.composite()[0], composite_name="x"),
+    "DALTask.close_composite": lambda s, d: DALTask(s).close_composite(d.composite()[0]),
+    "DALTask.close_composite[cascade]": lambda s, d: DALTask(s).close_composite(d.composite()[0], cascade=True),
+    "DALTask.create_task": lambda s, d: DALTask(s).create_task("bench", TaskLevel.free, None, d.user()),
+    "DALTask.get_task": lambda s, d: DALTask(s).get_task(user_id=d.user()),
+    "DALTask.list_tasks": lambda s, d: DALTask(s).list_tasks(d.user()),
+    "DALTask.search": lambda s, d: DALTask(s).search(d.user(), "'report' & 'cli':*"),
+    "DALTask.update_task": lambda s, d: _on_task(d, lambda task_id, user_id: DALTask(s).update_task(
+        task_id, user_id=user_id, task_level=TaskLevel.urgent)),
+    "DALTask.close_task": lambda s, d: _on_task(d, lambda task_id, user_id: DALTask(s).close_task(
+        task_id, user_id=user_id)),
+    "DALTask.delete_task": lambda s, d: _on_task(d, lambda task_id, user_id: DALTask(s).delete_task(
+        task_id, user_id=user_id)),
+    # crud helpers
+    "crud._get_user": lambda s, d: crud._get_user(d.user(), s, profile="full"),
+    "crud._update_user": lambda s, d: crud._update_user(d.user(), {"first_name": "Updated"}, s),
+    "crud._delete_user": lambda s, d: crud._delete_user(d.user(), s),
+    "crud._sign_up": lambda s, d: crud._sign_up(CreateUser(first_name="B", last_name="N", phone_number="bench-new"),
+                                                s),
+    "crud._create_composite": lambda s, d: crud._create_composite("bench", "bench", d.user(), s),
+    "crud._get_composite": lambda s, d: crud._get_composite(d.composite()[0], s, profile="full"),
+    "crud._list_composites": lambda s, d: crud._list_composites(d.user(), None, 50, s),
+    "crud._update_composite": lambda s, d: crud._update_composite(d.composite()[0], {"composite_name": "x"}, s),
+    "crud._close_composite": lambda s, d: crud._close_composite(d.composite()[0], s, cascade=True),
+    "crud._create_task": lambda s, d: crud._create_task("bench", TaskLevel.free, None, d.user(), s),
+    "crud._get_task": lambda s, d: crud._get_task(None, d.user(), s),
+    "crud._list_tasks": lambda s, d: crud._list_tasks(d.user(), None, None, 50, s),
+    "crud._update_task": lambda s, d: _on_task(d, lambda task_id, user_id: crud._update_task(
+        task_id, {"task_level": TaskLevel.urgent}, s, user_id=user_id)),
+    "crud._close_task": lambda s, d: _on_task(d, lambda task_id, user_id: crud._close_task(
+        task_id, s, user_id=user_id)),
+    "crud._delete_task": lambda s, d: _on_task(d, lambda task_id, user_id: crud._delete_task(
+        task_id, s, user_id=user_id)),
+    "crud._bulk_create_tasks": lambda s, d: crud._bulk_create_tasks(
+        [NewTask(task_description="bench", task_level=TaskLevel.free)] * 50, d.user(), s),
+    "crud._bulk_close_tasks": lambda s, d: _on_task(d, lambda task_id, user_id: crud._bulk_close_tasks(
+        [task_id], user_id, s)),
+}
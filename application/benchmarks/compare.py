@@ -0,0 +1,11 @@
+def compare(baseline: dict, current: dict, metric: str, threshold: float) -> list[str]:
+    """Return a line per case whose ``metric`` grew by more than ``threshold`` (0.2 == 20%)."""
+    regressions = []
+    for name, current_stats in current["results"].items():
+        baseline_stats = baseline["results"].get(name)
+        if baseline_stats is None:
+            continue
+        before, after = baseline_stats[metric], current_stats[metric]
+        if before > 0 and (after - before) / before > threshold:
+            regressions.append(f"{name}: {metric} {before:.3f}ms -> {after:.3f}ms (+{(after / before - 1):.0%})")
+    return regressions
@@ -0,0 +1,21 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class BenchmarkConfig(BaseSettings):
+    users: int = 10_000
+    composites_per_user: int = 5
+    tasks_per_user: int = 100
+    auth_pairs: int = 1_000
+    batch_size: int = 5_000
+
+    sample_size: int = 1_000
+    iterations: int = 200
+    warmup: int = 20
+
+    regression_metric: str = "p95"
+    regression_threshold: float = 0.2
+
+    model_config = SettingsConfigDict(env_prefix="BENCH_")
+
+
+benchmark_config = BenchmarkConfig()
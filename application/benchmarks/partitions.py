@@ -0,0 +1,38 @@
+from sqlalchemy import text
+
+from db import db_helper
+from .cases import CASES, Sample
+from .runner import run
+
+# the reads and the row-moving write the status partitioning is meant to speed up
+PARTITION_CASES = ("DALTask.get_task", "DALTask.close_task", "crud._close_task", "DALTask.close_composite[cascade]")
+
+_LAYOUT = text("""
+    SELECT child.relname, child.reltuples::bigint
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'tasks'
+    ORDER BY child.relname
+""")
+
+
+async def tasks_layout() -> dict[str, int]:
+    """Estimated rows per ``tasks`` partition, or ``{"tasks": n}`` while the table is not partitioned."""
+    async with db_helper.session_factory() as session:
+        partitions = {name: rows for name, rows in (await session.execute(_LAYOUT)).all()}
+        if partitions:
+            return partitions
+        rows = await session.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'tasks'"))
+        return {"tasks": rows}
+
+
+async def time_partition_cases(sample: Sample, iterations: int, warmup: int) -> dict:
+    """A ``run`` report restricted to ``PARTITION_CASES`` with the table layout in its meta.
+
+    Take one report before ``alembic upgrade`` and one after, then feed both to ``compare``.
+    """
+    report = await run(sample, iterations=iterations, warmup=warmup,
+                       cases={name: CASES[name] for name in PARTITION_CASES})
+    report["meta"]["tasks_layout"] = await tasks_layout()
+    return report
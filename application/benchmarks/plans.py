@@ -0,0 +1,51 @@
+import json
+
+from sqlalchemy import event
+
+from db import db_helper
+from .cases import CASES, Sample
+
+# tasks_default is left out: it only catches statuses outside ActiveObject, so it stays empty and a
+# Seq Scan over it costs nothing
+WATCHED_TABLES = ("tasks", "tasks_active", "tasks_done", "composites", "users", "auth_users")
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def check_plans(sample: Sample) -> list[str]:
+    """EXPLAIN every statement the cases issue and report sequential scans on the hot tables."""
+    captured: list[tuple[str, str, dict]] = []
+    current_case = [""]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("INSERT", "EXPLAIN")):
+            captured.append((current_case[0], statement, parameters))
+
+    event.listen(db_helper.engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        for name, case in CASES.items():
+            current_case[0] = name
+            async with db_helper.session_factory() as session:
+                await session.begin()
+                await case(session, sample)
+                await session.rollback()
+    finally:
+        event.remove(db_helper.engine.sync_engine, "before_cursor_execute", capture)
+
+    problems = []
+    async with db_helper.engine.connect() as connection:
+        for name, statement, parameters in captured:
+            res = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = res.scalar_one()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            for table in _seq_scans(plan[0]["Plan"]):
+                problems.append(f"{name}: Seq Scan on {table}\n    {' '.join(statement.split())}")
+        await connection.rollback()
+    return problems
@@ -0,0 +1,35 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from db.engine import DataBaseHelper
+from db_config import db_url_config, db_engine_config, PrepareMode
+from .cases import CASES, Sample
+from .runner import time_case
+
+
+MODES: tuple[PrepareMode, ...] = ("default", "prepared", "transaction_pooler")
+
+# the statements every authenticated request and every task page repeats
+HOT_CASES = ("DALUser.get_user[auth]", "DALTask.get_task", "DALTask.list_tasks", "DALTask.get_composite[summary]")
+
+
+async def compare_prepare_modes(sample: Sample, iterations: int, warmup: int,
+                                modes: tuple[PrepareMode, ...] = MODES) -> dict[str, dict[str, dict[str, float]]]:
+    """Time the hot cases once per prepare mode, each on a dedicated single-connection engine.
+
+    A single pooled connection makes every iteration reuse the same server session, which is
+    what lets prepared statements pay off (and what a transaction pooler takes away).
+    """
+    results = {}
+    for mode in modes:
+        engine = DataBaseHelper.create_engine(f"bench-{mode}", db_url_config.DATABASE_URL_psycopg,
+                                              pool_size=1, max_overflow=0, prepare_mode=mode,
+                                              prepare_threshold=db_engine_config.prepare_threshold,
+                                              prepared_max=db_engine_config.prepared_max)
+        session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        try:
+            results[mode] = {name: await time_case(CASES[name], sample, iterations=iterations, warmup=warmup,
+                                                   session_factory=session_factory)
+                             for name in HOT_CASES}
+        finally:
+            await engine.dispose()
+    return results
@@ -0,0 +1,48 @@
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from db import db_helper
+from .cases import CASES, Case, Sample
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50": percentiles[49], "p95": percentiles[94], "p99": percentiles[98],
+            "mean": statistics.fmean(timings), "iterations": len(timings)}
+
+
+async def time_case(case: Case, sample: Sample, iterations: int, warmup: int,
+                    session_factory: async_sessionmaker[AsyncSession] | None = None) -> dict[str, float]:
+    """Time one case in milliseconds; every call runs in its own rolled back transaction."""
+    session_factory = session_factory or db_helper.session_factory
+    timings = []
+    for iteration in range(warmup + iterations):
+        async with session_factory() as session:
+            await session.begin()
+            started = time.perf_counter()
+            await case(session, sample)
+            elapsed = time.perf_counter() - started
+            await session.rollback()
+        if iteration >= warmup:
+            timings.append(elapsed * 1000)
+    return summarize(timings)
+
+
+async def run(sample: Sample, iterations: int, warmup: int, only: str | None = None,
+              cases: dict[str, Case] | None = None) -> dict:
+    results = {}
+    for name, case in (cases or CASES).items():
+        if only and only not in name:
+            continue
+        results[name] = await time_case(case, sample, iterations=iterations, warmup=warmup)
+    return {
+        "meta": {"created_at": datetime.now(timezone.utc).isoformat(),
+                 "python": platform.python_version(),
+                 "iterations": iterations,
+                 "warmup": warmup},
+        "results": results,
+    }
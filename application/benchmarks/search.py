@@ -0,0 +1,50 @@
+import random
+from uuid import UUID
+
+from sqlalchemy import select, union_all, literal, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.crud import _prefix_tsquery
+from db import DALTask, Task, Composite
+from .cases import Case, Sample
+from .runner import run
+from .seed import WORDS
+
+
+def _terms(words: int, prefix: bool = False) -> str:
+    terms = random.sample(WORDS, words)
+    if prefix:
+        # what a client sends while the last word is still being typed
+        terms[-1] = terms[-1][:3]
+    return " ".join(terms)
+
+
+async def _ilike_search(session: AsyncSession, user_id: UUID, query: str, limit: int = 50) -> list:
+    """What clients do today, moved server side: substring match on every word, newest first."""
+    parts = []
+    for kind, entity, key, title, owned in (
+            ("task", Task, Task.task_id, Task.task_description, DALTask._owned_by(user_id)),
+            ("composite", Composite, Composite.composite_id, Composite.composite_name,
+             Composite.user_id == user_id)):
+        criteria = and_(owned, *(title.ilike(f"%{word}%") for word in query.split()))
+        parts.append(select(literal(kind).label("kind"), key.label("object_id"), title.label("title"),
+                            entity.created_at)
+                     .where(criteria).order_by(entity.created_at.desc()).limit(limit))
+    found = union_all(*parts).subquery()
+    res = await session.execute(select(found).order_by(found.c.created_at.desc()).limit(limit))
+    return res.all()
+
+
+SEARCH_CASES: dict[str, Case] = {
+    "search[fts]": lambda s, d: DALTask(s).search(d.user(), _prefix_tsquery(_terms(1))),
+    "search[fts,2 words]": lambda s, d: DALTask(s).search(d.user(), _prefix_tsquery(_terms(2))),
+    "search[fts,type-ahead]": lambda s, d: DALTask(s).search(d.user(), _prefix_tsquery(_terms(2, prefix=True))),
+    "search[ilike]": lambda s, d: _ilike_search(s, d.user(), _terms(1)),
+    "search[ilike,2 words]": lambda s, d: _ilike_search(s, d.user(), _terms(2)),
+    "search[ilike,type-ahead]": lambda s, d: _ilike_search(s, d.user(), _terms(2, prefix=True)),
+}
+
+
+async def compare_search(sample: Sample, iterations: int, warmup: int) -> dict:
+    """A ``run`` report of the full-text cases next to their ILIKE equivalents on the seeded corpus."""
+    return await run(sample, iterations=iterations, warmup=warmup, cases=SEARCH_CASES)
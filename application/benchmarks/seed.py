@@ -0,0 +1,91 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import db_helper, User, AuthUser, Composite, Task, PortalRoles, ActiveObject, TaskLevel
+
+PHONE_PREFIX = "bench-"
+
+# text corpus for the search benchmark; drawn with Zipf-like weights so some words are
+# in most rows and others in almost none, like real task lists
+WORDS = ("call", "send", "review", "update", "report", "meeting", "client", "invoice", "budget", "draft", "plan",
+         "deploy", "fix", "release", "check", "order", "team", "design", "contract", "schedule", "payment",
+         "backup", "server", "database", "migration", "presentation", "quarterly", "summary", "onboarding",
+         "interview", "feedback", "roadmap", "estimate", "vendor", "warehouse", "shipment", "inventory",
+         "newsletter", "campaign", "analytics", "dashboard", "security", "audit", "compliance", "training",
+         "workshop", "conference", "travel", "expense", "renewal", "license", "hardware", "laptop", "printer",
+         "office", "cleaning", "birthday", "dentist", "groceries", "pharmacy")
+_WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+
+def sentence(words: int) -> str:
+    return " ".join(random.choices(WORDS, weights=_WEIGHTS, k=words))
+
+
+def _created_at(now: datetime) -> datetime:
+    return (now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))).replace(tzinfo=None)
+
+
+async def _flush(session: AsyncSession, entity, rows: list[dict]) -> None:
+    if rows:
+        await session.execute(insert(entity), rows)
+        rows.clear()
+
+
+async def seed(users: int, composites_per_user: int, tasks_per_user: int, auth_pairs: int, batch_size: int) -> None:
+    """Insert a synthetic dataset; seeded users are recognised by their ``bench-`` phone numbers."""
+    now = datetime.now(timezone.utc)
+    levels = list(TaskLevel)
+    user_rows, composite_rows, task_rows = [], [], []
+
+    async with db_helper.session_factory() as session:
+        for number in range(users):
+            user_id = uuid.uuid4()
+            user_rows.append({"user_id": user_id, "phone_number": f"{PHONE_PREFIX}{number}",
+                              "first_name": "Bench", "last_name": str(number),
+                              "roles": [PortalRoles.ROLE_PORTAL_USER], "is_active": True})
+
+            composite_ids = [uuid.uuid4() for _ in range(composites_per_user)]
+            for composite_id in composite_ids:
+                composite_rows.append({"composite_id": composite_id, "composite_name": sentence(3),
+                                       "composite_description": sentence(12),
+                                       "created_at": _created_at(now),
+                                       "composite_status": random.choice(list(ActiveObject)),
+                                       "user_id": user_id})
+
+            for task_number in range(tasks_per_user):
+                # mirrors DALTask.create_task: composite tasks carry no user_id
+                slot = task_number % (composites_per_user + 1)
+                status = random.choice(list(ActiveObject))
+                created_at = _created_at(now)
+                task_rows.append({"task_id": uuid.uuid4(), "task_description": sentence(8),
+                                  "task_level": random.choice(levels),
+                                  "composite_id": composite_ids[slot - 1] if slot else None,
+                                  "user_id": None if slot else user_id,
+                                  "created_at": created_at, "task_status": status,
+                                  "closed_at": created_at if status is ActiveObject.done else None})
+
+            if len(task_rows) >= batch_size:
+                await _flush(session, User, user_rows)
+                await _flush(session, Composite, composite_rows)
+                await _flush(session, Task, task_rows)
+                await session.commit()
+
+        await _flush(session, User, user_rows)
+        await _flush(session, Composite, composite_rows)
+        await _flush(session, Task, task_rows)
+
+        pair_rows = [{"phone_number": f"{PHONE_PREFIX}pair-{number}", "first_name": "Bench", "last_name": "Pair",
+                      "identity_number": random.randint(10_000, 99_999)} for number in range(auth_pairs)]
+        for offset in range(0, len(pair_rows), batch_size):
+            await _flush(session, AuthUser, pair_rows[offset:offset + batch_size])
+        await session.commit()
+
+
+async def is_seeded() -> bool:
+    async with db_helper.session_factory() as session:
+        res = await session.execute(select(User.user_id).where(User.phone_number.like(f"{PHONE_PREFIX}%")).limit(1))
+        return res.first() is not None
@@ -0,0 +1,53 @@
+import time
+import uuid
+from datetime import datetime
+
+import orjson
+from pydantic import TypeAdapter
+
+from api.models import ShowComposite, ShowTask
+from api.serializers import dump_composite
+from db import Composite, Task, ActiveObject, TaskLevel
+
+
+def build_composite(tasks: int) -> Composite:
+    composite_id = uuid.uuid4()
+    now = datetime.now().replace(microsecond=0)
+    return Composite(composite_id=composite_id, composite_name="bench", composite_description="bench",
+                     created_at=now, composite_status=ActiveObject.active, user_id=uuid.uuid4(),
+                     tasks=[Task(task_id=uuid.uuid4(), task_description=f"task {number}", task_level=TaskLevel.free,
+                                 composite_id=composite_id, created_at=now, task_status=ActiveObject.active)
+                            for number in range(tasks)])
+
+
+_show_composite = TypeAdapter(ShowComposite)
+
+
+def render_validated(composite: Composite) -> bytes:
+    """The previous path: handler-built models, response_model re-validation, then ORJSONResponse."""
+    model = ShowComposite(composite_id=composite.composite_id,
+                          composite_name=composite.composite_name,
+                          composite_description=composite.composite_description,
+                          created_at=composite.created_at,
+                          composite_status=composite.composite_status,
+                          user_id=composite.user_id,
+                          tasks=[ShowTask.model_validate(row, from_attributes=True) for row in composite.tasks])
+    content = _show_composite.validate_python(model.model_dump())
+    return orjson.dumps(_show_composite.dump_python(content, mode="json"))
+
+
+def render_direct(composite: Composite) -> bytes:
+    return orjson.dumps(dump_composite(composite))
+
+
+def compare_serializers(tasks: int, repeat: int) -> dict[str, float]:
+    """CPU milliseconds per response for both paths."""
+    composite = build_composite(tasks)
+    assert orjson.loads(render_validated(composite)) == orjson.loads(render_direct(composite))
+    results = {}
+    for name, render in (("validated", render_validated), ("direct", render_direct)):
+        started = time.process_time()
+        for _ in range(repeat):
+            render(composite)
+        results[name] = (time.process_time() - started) * 1000 / repeat
+    return results
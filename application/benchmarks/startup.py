@@ -0,0 +1,30 @@
+import json
+import statistics
+import subprocess
+import sys
+
+
+_PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+created = time.perf_counter()
+app.openapi()
+print(json.dumps({"import": imported - started, "create_app": created - imported,
+                  "openapi": time.perf_counter() - created}))
+"""
+
+
+def measure_startup(repeat: int) -> dict[str, dict[str, float]]:
+    """Cold ``import main``, ``create_app()`` and first ``openapi()`` in fresh interpreters, in milliseconds.
+
+    No database is needed: engines are only created when the lifespan starts.
+    """
+    runs = [json.loads(subprocess.run([sys.executable, "-c", _PROBE], check=True, capture_output=True,
+                                      text=True).stdout.splitlines()[-1])
+            for _ in range(repeat)]
+    return {phase: {"median": statistics.median(run[phase] for run in runs) * 1000,
+                    "max": max(run[phase] for run in runs) * 1000}
+            for phase in runs[0]}
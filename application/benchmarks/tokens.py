@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from security import create_access_token, create_refresh_token, decode_jwt
+from security.codecs import CODECS, TokenCodec, build_codec
+
+
+def _pem_pair(private_key) -> tuple[str, str]:
+    private_pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                            serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem.decode(), public_pem.decode()
+
+
+def _codecs() -> dict[str, TokenCodec]:
+    """Every backend/algorithm combination that is installed and supported; throwaway keys."""
+    keys = {"HS256": {"secret_key": uuid.uuid4().hex},
+            "ES256": dict(zip(("private_key", "public_key"), _pem_pair(ec.generate_private_key(ec.SECP256R1())))),
+            "EdDSA": dict(zip(("private_key", "public_key"), _pem_pair(ed25519.Ed25519PrivateKey.generate())))}
+    codecs = {}
+    for backend in CODECS:
+        for algorithm, key in keys.items():
+            try:
+                codecs[f"{backend}/{algorithm}"] = build_codec(backend, algorithm, **key)
+            except (ImportError, ValueError):
+                continue
+    return codecs
+
+
+def _per_second(call, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return repeat / (time.perf_counter() - started)
+
+
+def token_throughput(repeat: int) -> dict[str, dict[str, float]]:
+    """Tokens per second for issuing access and refresh tokens and for verifying an access token."""
+    user_id = uuid.uuid4()
+    results = {}
+    for name, codec in _codecs().items():
+        token = create_access_token(user_id, codec=codec)
+        results[name] = {
+            "create_access_token": _per_second(lambda: create_access_token(user_id, codec=codec), repeat),
+            "create_refresh_token": _per_second(lambda: create_refresh_token(user_id, codec=codec), repeat),
+            "decode": _per_second(lambda: decode_jwt(token, codec=codec), repeat),
+        }
+    return results
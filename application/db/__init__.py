@@ -9,9 +9,29 @@ __all__ = ("db_helper",
            "ActiveObject",
            "Composite",
            "Task",
-           "TaskLevel"
+           "TaskLevel",
+           "Principal",
+           "principal_cache",
+           "RevokedToken",
+           "DALRevokedToken",
+           "revocation_list",
+           "pending_signups",
+           "VerificationStatus",
+           "CompositeArchive",
+           "TaskArchive",
+           "DALArchive",
+           "archiver",
+           "after_commit",
+           "has_written",
+           "PrimaryStickyMiddleware"
            )
 
-from .engine import db_helper
-from .schemas import Base, User, AuthUser, PortalRoles, ActiveObject, Composite, Task, TaskLevel
-from .dals import DALUser, DALAuth, DALTask
+from .engine import db_helper, PrimaryStickyMiddleware
+from .hooks import after_commit, has_written
+from .schemas import (Base, User, AuthUser, PortalRoles, ActiveObject, Composite, Task, TaskLevel, RevokedToken,
+                      CompositeArchive, TaskArchive)
+from .principals import Principal, principal_cache
+from .dals import DALUser, DALAuth, DALTask, DALRevokedToken, DALArchive
+from .revocations import revocation_list
+from .pending import pending_signups, VerificationStatus
+from .archive import archiver
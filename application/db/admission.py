@@ -0,0 +1,115 @@
+import asyncio
+import heapq
+import itertools
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from starlette.requests import Request
+
+from db_config import AdmissionConfig
+from extentions import ERROR_503_SERVICE_UNAVAILABLE
+from monitoring import registry
+from monitoring.middleware import route_template
+
+
+admission_queue_depth = registry.gauge("db_admission_queue_depth", "Requests waiting for a database session.")
+admission_in_use = registry.gauge("db_admission_in_use", "Requests holding an admitted database session.")
+admission_rejected = registry.counter("db_admission_rejected_total", "Requests refused after their queue deadline.")
+
+
+class AdmissionController:
+    """Hands out at most ``capacity`` sessions, per-class capped, highest priority first.
+
+    Waiting here instead of inside the pool lets auth refreshes overtake
+    bulk writes, and lets a request give up with a 503 when its class
+    deadline passes rather than all of them timing out together.
+
+    Only request sessions are admitted. The background jobs (revocation
+    sync, pending sign-up sweep, archiver) open theirs straight from the
+    pool, one connection each at a time, so ``capacity`` is an upper bound
+    on what requests can actually get.
+
+    """
+
+    def __init__(self, capacity: int, config: AdmissionConfig) -> None:
+        self.capacity = capacity
+        self.config = config
+        self.in_use = 0
+        self._active: Counter[str] = Counter()
+        self._waiters: list[tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def route_class(self, request: Request) -> str:
+        template = route_template(request.scope)
+        name = self.config.routes.get(f"{request.method} {template}", self.config.routes.get(template))
+        if name is None:
+            name = "read" if request.method == "GET" else "write"
+        return name
+
+    def _admissible(self, name: str) -> bool:
+        return self.in_use < self.capacity and self._active[name] < self.config.classes[name].max_concurrency
+
+    def _take(self, name: str) -> None:
+        self.in_use += 1
+        self._active[name] += 1
+        admission_in_use.set(self._active[name], route_class=name)
+
+    def _release(self, name: str) -> None:
+        self.in_use -= 1
+        self._active[name] -= 1
+        admission_in_use.set(self._active[name], route_class=name)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        blocked = []
+        while self._waiters and self.in_use < self.capacity:
+            waiter = heapq.heappop(self._waiters)
+            _, _, name, future = waiter
+            if future.done():
+                # gave up already
+                continue
+            if not self._admissible(name):
+                blocked.append(waiter)
+                continue
+            self._take(name)
+            future.set_result(None)
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+        self._report_depth()
+
+    def _report_depth(self) -> None:
+        depth = Counter(name for _, _, name, future in self._waiters if not future.done())
+        for name in self.config.classes:
+            admission_queue_depth.set(depth[name], route_class=name)
+
+    async def _acquire(self, name: str) -> None:
+        admission_class = self.config.classes[name]
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (admission_class.priority, next(self._sequence), name, future))
+        self._dispatch()
+        if future.done():
+            return
+        try:
+            await asyncio.wait_for(future, timeout=admission_class.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if future.done() and not future.cancelled():
+                # granted in the same loop iteration the deadline fired
+                self._release(name)
+            self._report_depth()
+            if isinstance(error, asyncio.TimeoutError):
+                admission_rejected.inc(route_class=name)
+                raise ERROR_503_SERVICE_UNAVAILABLE
+            raise
+
+    @asynccontextmanager
+    async def admit(self, request: Request) -> AsyncIterator[None]:
+        if not self.config.enabled:
+            yield
+            return
+        name = self.route_class(request)
+        await self._acquire(name)
+        try:
+            yield
+        finally:
+            self._release(name)
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from db_config import archive_config, ArchiveConfig
+from .dals import DALArchive
+from .engine import db_helper
+
+
+class Archiver:
+    """Moves finished and abandoned rows from ``tasks``/``composites`` into their ``*_archive`` twins.
+
+    Every chunk is its own short transaction, so the job can stop anywhere
+    and pick up where it left off. Locked rows are skipped, and a chunk that
+    waits on a lock past ``lock_timeout_ms`` ends the pass instead of stalling
+    the request path behind it.
+
+    """
+
+    def __init__(self, config: ArchiveConfig) -> None:
+        self.config = config
+
+    async def _move_chunk(self, table: str, done_before: datetime) -> int:
+        async with db_helper.session_factory() as session:
+            async with session.begin():
+                await session.execute(select(func.set_config("lock_timeout", f"{self.config.lock_timeout_ms}ms",
+                                                             True)))
+                dal = DALArchive(session)
+                if table == "tasks":
+                    return await dal.archive_tasks(self.config.chunk_size, done_before)
+                return await dal.archive_composites(self.config.chunk_size, done_before)
+
+    async def archive(self) -> dict[str, int]:
+        done_before = datetime.now(timezone.utc) - timedelta(days=self.config.done_age_days)
+        moved = dict.fromkeys(("tasks", "composites"), 0)
+        # tasks first: a composite is only archived once no task points at it
+        for table in moved:
+            while True:
+                try:
+                    chunk = await self._move_chunk(table, done_before)
+                except DBAPIError as error:
+                    logger.warning("archiving {} stopped for this pass: {}", table, error.orig)
+                    break
+                moved[table] += chunk
+                if chunk < self.config.chunk_size:
+                    break
+                await asyncio.sleep(self.config.pause)
+        return moved
+
+    async def run(self, interval: float) -> None:
+        """Archive every ``interval`` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                moved = await self.archive()
+                if any(moved.values()):
+                    logger.info("archived {tasks} tasks and {composites} composites", **moved)
+            except Exception:
+                logger.exception("archiving failed")
+
+
+archiver = Archiver(archive_config)
@@ -1,14 +1,55 @@
-from typing import Union
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from typing import Union, Literal, AsyncIterator
 from uuid import UUID
 
-from sqlalchemy import select, update, and_, Result, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (select, update, insert, and_, or_, any_, bindparam, Result, delete, tuple_, Select, func,
+                        cast, Text, literal, union_all, Row)
+from sqlalchemy.dialects.postgresql import ARRAY, REAL, insert as pg_insert
+from sqlalchemy.orm import selectinload, load_only
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .schemas import User, AuthUser, PortalRoles, Composite, Task, ActiveObject, TaskLevel
+from .schemas import (User, AuthUser, PortalRoles, Composite, Task, ActiveObject, TaskLevel, GUID, RevokedToken,
+                      CompositeArchive, TaskArchive, SEARCH_CONFIG)
+from .principals import principal_cache
+from .hooks import after_commit
+
+
+LoadingProfile = Literal["auth", "summary", "full"]
+KeysetCursor = tuple[datetime, UUID]
+RankCursor = tuple[float, UUID]
+
+COMPOSITE_COUNTERS = ("open_count", "done_count", "free_count", "optimal_count", "urgent_count")
+TASK_COLUMNS = ("task_id", "task_description", "task_level", "composite_id", "user_id", "created_at", "task_status",
+                "closed_at", "version")
+
+
+def _task_counters(task_status: ActiveObject, task_level: TaskLevel) -> Counter:
+    status_counter = "open_count" if task_status == ActiveObject.active else "done_count"
+    return Counter({status_counter: 1, f"{TaskLevel(task_level).value}_count": 1})
+
+
+def _fingerprint(id_column, version_column):
+    """Order independent digest of (id, version) pairs: changes on any insert, delete or versioned update."""
+    return func.coalesce(func.sum(func.hashtextextended(cast(id_column, Text), version_column)), 0)
+
+
+def _profile_options(profiles: dict[str, tuple], profile: LoadingProfile) -> tuple:
+    try:
+        return profiles[profile]
+    except KeyError:
+        raise ValueError(f"Unknown loading profile {profile!r}, expected one of {tuple(profiles)}")
 
 
 class DALUser:
+    loading_profiles: dict[str, tuple] = {
+        "auth": (load_only(User.user_id, User.roles, User.is_active),),
+        "summary": (),
+        "full": (selectinload(User.composites).selectinload(Composite.tasks),
+                 selectinload(User.tasks)),
+    }
+
     def __init__(self, db_session):
         self.db_session = db_session
 
@@ -25,23 +66,37 @@ class DALUser:
 
     async def delete_user(self, user_id: UUID) -> Union[User, None]:
         stm = update(User).where(and_(User.user_id == user_id, User.is_active == True)).values(
-            is_active=False).returning(User.user_id)
+            is_active=False, version=User.version + 1).returning(User.user_id)
         res = await self.db_session.execute(stm)
         deleted_user_id_row = res.fetchone()
+        # after commit: invalidating earlier lets a concurrent request re-cache the old row
+        after_commit(self.db_session, partial(principal_cache.invalidate, user_id))
         return deleted_user_id_row[0]
 
-    async def get_user(self, user_id: Union[str, UUID]) -> Union[User, None]:
-        stm = select(User).where(User.user_id == user_id)
+    async def get_user(self, user_id: Union[str, UUID], profile: LoadingProfile = "summary") -> Union[User, None]:
+        stm = select(User).where(User.user_id == user_id).options(*_profile_options(self.loading_profiles, profile))
         res = await self.db_session.execute(stm)
         user_row = res.fetchone()
         return user_row[0]
 
-    async def update_user(self, user_id: UUID, **kwargs) -> Union[User, None]:
-        stm = update(User).where(User.user_id == user_id).values(kwargs).returning(User)
+    async def get_user_version(self, user_id: UUID) -> tuple | None:
+        """Everything the ``full`` profile renders, reduced to versions: no relationship or model loading."""
+        composites = select(_fingerprint(Composite.composite_id, Composite.version)).where(Composite.user_id == user_id)
+        tasks = select(_fingerprint(Task.task_id, Task.version)).where(DALTask._owned_by(user_id))
+        stm = select(User.version, composites.scalar_subquery(), tasks.scalar_subquery()).where(User.user_id == user_id)
+        res = await self.db_session.execute(stm)
+        return res.first()
+
+    async def update_user(self, user_id: UUID, expected_version: int | None = None, **kwargs) -> Union[User, None]:
+        """``None`` when ``expected_version`` is given and no longer current."""
+        stm = update(User).where(User.user_id == user_id)
+        if expected_version is not None:
+            stm = stm.where(User.version == expected_version)
+        stm = stm.values({**kwargs, "version": User.version + 1}).returning(User)
         res = await self.db_session.execute(stm)
         update_user_row = res.fetchone()
-        print(update_user_row)
-        return update_user_row[0]
+        after_commit(self.db_session, partial(principal_cache.invalidate, user_id))
+        return update_user_row[0] if update_user_row is not None else None
 
 
 class DALAuth:
@@ -68,8 +123,70 @@ class DALAuth:
         auth_user_row = res.fetchone()
         return auth_user_row[0]
 
+    async def consume_pair(self, pair_id: UUID, identity_number: int, max_attempts: int) -> AuthUser | None:
+        """Delete and return the pair if the number matches; concurrent verifications cannot both win."""
+        stm = (delete(AuthUser)
+               .where(AuthUser.auth_id == pair_id,
+                      AuthUser.identity_number == identity_number,
+                      AuthUser.expires_at > func.now(),
+                      AuthUser.attempts < max_attempts)
+               .returning(AuthUser))
+        res = await self.db_session.execute(stm)
+        return res.scalar_one_or_none()
+
+    async def register_failed_attempt(self, pair_id: UUID, max_attempts: int) -> bool:
+        """Count a wrong number; ``False`` if the pair is gone, expired or out of attempts."""
+        stm = (update(AuthUser)
+               .where(AuthUser.auth_id == pair_id,
+                      AuthUser.expires_at > func.now(),
+                      AuthUser.attempts < max_attempts)
+               .values(attempts=AuthUser.attempts + 1)
+               .returning(AuthUser.auth_id))
+        res = await self.db_session.execute(stm)
+        return res.scalar_one_or_none() is not None
+
+    async def delete_expired(self, chunk_size: int) -> int:
+        """Delete at most ``chunk_size`` expired pairs, skipping rows other sessions hold."""
+        expired = (select(AuthUser.auth_id)
+                   .where(AuthUser.expires_at <= func.now())
+                   .limit(chunk_size)
+                   .with_for_update(skip_locked=True))
+        res = await self.db_session.execute(delete(AuthUser).where(AuthUser.auth_id.in_(expired.scalar_subquery())))
+        return res.rowcount
+
+
+class DALRevokedToken:
+
+    def __init__(self, db_session):
+        self.db_session: AsyncSession = db_session
+
+    async def revoke(self, tokens: dict[UUID, datetime]) -> None:
+        """Persist ``{jti: expires_at}``; revoking the same token twice is a no-op."""
+        if not tokens:
+            return
+        stm = pg_insert(RevokedToken).on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        await self.db_session.execute(stm, [{"jti": jti, "expires_at": expires_at}
+                                            for jti, expires_at in tokens.items()])
+
+    async def get_revoked(self, since: datetime | None = None) -> list[tuple[UUID, datetime, datetime]]:
+        """Unexpired ``(jti, expires_at, revoked_at)`` rows, optionally only those revoked after ``since``."""
+        stm = (select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+               .where(RevokedToken.expires_at > func.now()))
+        if since is not None:
+            stm = stm.where(RevokedToken.revoked_at > since)
+        res = await self.db_session.execute(stm)
+        return [tuple(row) for row in res.all()]
+
+    async def prune(self) -> int:
+        res = await self.db_session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+        return res.rowcount
+
 
 class DALTask:
+    composite_loading_profiles: dict[str, tuple] = {
+        "summary": (),
+        "full": (selectinload(Composite.tasks),),
+    }
 
     def __init__(self, db_session):
         self.db_session: AsyncSession = db_session
@@ -83,33 +200,125 @@ class DALTask:
         await self.db_session.flush()
         return new_composite
 
-    async def get_composite(self, composite_id: UUID):
-        stm = select(Composite).where(Composite.composite_id == composite_id)
+    async def get_composite(self, composite_id: UUID, profile: LoadingProfile = "summary"):
+        stm = (select(Composite).where(Composite.composite_id == composite_id)
+               .options(*_profile_options(self.composite_loading_profiles, profile)))
         res = await self.db_session.execute(stm)
         composite = res.fetchone()
         return composite[0]
 
+    async def list_composites(self, user_id: UUID, after: KeysetCursor | None = None,
+                              limit: int = 50) -> list[Composite]:
+        stm = select(Composite).where(Composite.user_id == user_id)
+        if after is not None:
+            stm = stm.where(tuple_(Composite.created_at, Composite.composite_id) > after)
+        stm = stm.order_by(Composite.created_at, Composite.composite_id).limit(limit)
+        res = await self.db_session.execute(stm)
+        return list(res.scalars())
+
     async def delete_composite(self, composite_id: UUID):
         stm = delete(Composite).where(Composite.composite_id == composite_id).returning(Composite)
         res = await self.db_session.execute(stm)
         deleted_composite = res.fetchone()
         return deleted_composite[0]
 
-    async def close_composite(self, composite_id: UUID):
-        stm = (update(Composite)
-               .where(and_(Composite.composite_id == composite_id,
-                           Composite.composite_status == ActiveObject.active))
-               .values(composite_status=ActiveObject.done)
-               .returning(Composite))
+    async def close_composite(self, composite_id: UUID, cascade: bool = False) -> tuple[Composite | None, int]:
+        """Close an active composite, with ``cascade`` also its active tasks; returns (composite, tasks closed).
+
+        One statement either way: the tasks UPDATE runs as a CTE that only fires while the
+        composite is still active, and its row count feeds the composite's counters.
+        """
+        is_active = and_(Composite.composite_id == composite_id, Composite.composite_status == ActiveObject.active)
+        values = {"composite_status": ActiveObject.done, "version": Composite.version + 1}
+        closed_count = literal(0)
+        if cascade:
+            closed_tasks = (update(Task)
+                            .where(and_(Task.composite_id == composite_id,
+                                        Task.task_status == ActiveObject.active,
+                                        select(Composite.composite_id).where(is_active).exists()))
+                            .values(task_status=ActiveObject.done,
+                                    closed_at=func.date_trunc("second", func.now()),
+                                    version=Task.version + 1)
+                            .returning(Task.task_id)
+                            .cte("closed_tasks"))
+            closed_count = select(func.count()).select_from(closed_tasks).scalar_subquery()
+            values.update(open_count=Composite.open_count - closed_count,
+                          done_count=Composite.done_count + closed_count)
+        stm = (update(Composite).where(is_active).values(values)
+               .returning(Composite, closed_count)
+               .execution_options(synchronize_session=False))
+        if cascade:
+            stm = stm.add_cte(closed_tasks)
         res = await self.db_session.execute(stm)
         closed_composite = res.fetchone()
-        return closed_composite[0]
+        if closed_composite is None:
+            return None, 0
+        return closed_composite[0], closed_composite[1]
 
-    async def update_composites(self, composite_id: UUID, **kwargs) -> Composite:
-        stm = update(Composite).where(Composite.composite_id == composite_id).values(kwargs).returning(Composite)
+    async def get_composite_version(self, composite_id: UUID) -> tuple | None:
+        tasks = select(_fingerprint(Task.task_id, Task.version)).where(Task.composite_id == composite_id)
+        stm = select(Composite.version, tasks.scalar_subquery()).where(Composite.composite_id == composite_id)
+        res = await self.db_session.execute(stm)
+        return res.first()
+
+    async def update_composites(self, composite_id: UUID, profile: LoadingProfile = "summary",
+                                expected_version: int | None = None, **kwargs) -> Composite | None:
+        stm = update(Composite).where(Composite.composite_id == composite_id)
+        if expected_version is not None:
+            stm = stm.where(Composite.version == expected_version)
+        stm = stm.values({**kwargs, "version": Composite.version + 1}).returning(Composite)
+        stm = (select(Composite).from_statement(stm)
+               .options(*_profile_options(self.composite_loading_profiles, profile)))
         res: Result = await self.db_session.execute(stm)
         updated_composite = res.fetchone()
-        return updated_composite[0]
+        return updated_composite[0] if updated_composite is not None else None
+
+    async def _shift_counters(self, deltas: dict[UUID, Counter]) -> None:
+        params = [{"b_composite_id": composite_id, **{f"b_{name}": delta[name] for name in COMPOSITE_COUNTERS}}
+                  for composite_id, delta in sorted(deltas.items())
+                  if composite_id is not None and any(delta.values())]
+        if not params:
+            return
+        # one executemany over composites, always in the same order so concurrent writers do not deadlock
+        composites = Composite.__table__
+        stm = (update(composites)
+               .where(composites.c.composite_id == bindparam("b_composite_id"))
+               .values({name: composites.c[name] + bindparam(f"b_{name}") for name in COMPOSITE_COUNTERS}))
+        await self.db_session.execute(stm, params)
+
+    async def _update_tasks_where(self, criteria, values: dict) -> list:
+        """UPDATE the matching tasks, returning (Task, previous task_level) rows for the level counters."""
+        previous = (select(Task.task_id, Task.task_status, Task.task_level.label("previous_level"))
+                    .where(criteria).with_for_update().subquery())
+        # matching on the whole primary key lets each partition answer from its own index
+        stm = (update(Task).where(and_(Task.task_id == previous.c.task_id, Task.task_status == previous.c.task_status))
+               .values({**values, "version": Task.version + 1})
+               .returning(Task, previous.c.previous_level)
+               .execution_options(synchronize_session=False))
+        res = await self.db_session.execute(stm)
+        rows = res.all()
+        deltas: dict[UUID, Counter] = {}
+        for task, previous_level in rows:
+            if task.composite_id is not None and task.task_level != previous_level:
+                delta = deltas.setdefault(task.composite_id, Counter())
+                delta[f"{TaskLevel(previous_level).value}_count"] -= 1
+                delta[f"{TaskLevel(task.task_level).value}_count"] += 1
+        await self._shift_counters(deltas)
+        return rows
+
+    async def _close_tasks_where(self, criteria) -> list[Task]:
+        stm = (update(Task)
+               .where(and_(criteria, Task.task_status == ActiveObject.active))
+               .values(task_status=ActiveObject.done, version=Task.version + 1)
+               .returning(Task))
+        res = await self.db_session.execute(stm)
+        tasks = list(res.scalars())
+        deltas: dict[UUID, Counter] = {}
+        for task in tasks:
+            if task.composite_id is not None:
+                deltas.setdefault(task.composite_id, Counter()).update(open_count=-1, done_count=1)
+        await self._shift_counters(deltas)
+        return tasks
 
     async def create_task(self,
                           task_description: str,
@@ -128,16 +337,48 @@ class DALTask:
                         task_status=ActiveObject.active)
         self.db_session.add(task)
         await self.db_session.flush()
+        await self._shift_counters({task.composite_id: _task_counters(task.task_status, task.task_level)})
         return task
 
+    @staticmethod
+    def _first_task_statement(columns, composite_id: UUID | None, user_id: UUID | None) -> Select:
+        criteria = Task.composite_id == composite_id if composite_id else Task.user_id == user_id
+        # ordered so the version probe and the full load pick the same task
+        return select(*columns).where(criteria).order_by(Task.created_at, Task.task_id).limit(1)
+
     async def get_task(self, composite_id: UUID | None = None, user_id: UUID | None = None):
+        res = await self.db_session.execute(self._first_task_statement((Task,), composite_id, user_id))
+        composite = res.fetchone()
+        return composite[0]
+
+    async def get_task_version(self, composite_id: UUID | None = None, user_id: UUID | None = None) -> tuple | None:
+        res = await self.db_session.execute(self._first_task_statement((Task.task_id, Task.version),
+                                                                       composite_id, user_id))
+        return res.first()
+
+    @staticmethod
+    def _tasks_keyset_statement(user_id: UUID, composite_id: UUID | None, after: KeysetCursor | None) -> Select:
         if composite_id:
-            stm = select(Task).where(Task.composite_id == composite_id)
+            stm = (select(Task).join(Composite, Task.composite_id == Composite.composite_id)
+                   .where(and_(Task.composite_id == composite_id, Composite.user_id == user_id)))
         else:
             stm = select(Task).where(Task.user_id == user_id)
+        if after is not None:
+            stm = stm.where(tuple_(Task.created_at, Task.task_id) > after)
+        return stm.order_by(Task.created_at, Task.task_id)
+
+    async def list_tasks(self, user_id: UUID, composite_id: UUID | None = None, after: KeysetCursor | None = None,
+                         limit: int = 50) -> list[Task]:
+        stm = self._tasks_keyset_statement(user_id, composite_id, after).limit(limit)
         res = await self.db_session.execute(stm)
-        composite = res.fetchone()
-        return composite[0]
+        return list(res.scalars())
+
+    async def stream_tasks(self, user_id: UUID, composite_id: UUID | None = None, after: KeysetCursor | None = None,
+                           batch_size: int = 500) -> AsyncIterator[Task]:
+        stm = self._tasks_keyset_statement(user_id, composite_id, after).execution_options(yield_per=batch_size)
+        res = await self.db_session.stream_scalars(stm)
+        async for task in res:
+            yield task
 
     async def delete_task(self, task_id: UUID, composite_id: UUID | None = None, user_id: UUID | None = None):
         if composite_id:
@@ -146,32 +387,191 @@ class DALTask:
             stm = delete(Task).where(and_(Task.user_id == user_id, Task.task_id == task_id)).returning(Task)
         res = await self.db_session.execute(stm)
         response = res.fetchone()
+        if response is not None:
+            task = response[0]
+            delta = Counter()
+            delta.subtract(_task_counters(task.task_status, task.task_level))
+            await self._shift_counters({task.composite_id: delta})
         return response[0]
 
-    async def update_task(self, task_id: UUID, composite_id: UUID | None = None, user_id: UUID | None = None, **kwargs):
+    async def update_task(self, task_id: UUID, composite_id: UUID | None = None, user_id: UUID | None = None,
+                          expected_version: int | None = None, **kwargs):
         if composite_id:
-            stm = (update(Task).where(and_(Task.task_id == task_id, Task.composite_id == composite_id)).values(kwargs)
-                   .returning(Task))
+            criteria = and_(Task.task_id == task_id, Task.composite_id == composite_id)
         else:
-            stm = (update(Task).where(and_(Task.task_id == task_id, Task.user_id == user_id)).values(kwargs)
-                   .returning(Task))
-        res = await self.db_session.execute(stm)
-        response = res.fetchone()
-        return response[0]
+            criteria = and_(Task.task_id == task_id, Task.user_id == user_id)
+        if expected_version is not None:
+            criteria = and_(criteria, Task.version == expected_version)
+        rows = await self._update_tasks_where(criteria, kwargs)
+        return rows[0][0] if rows else None
 
     async def close_task(self, task_id: UUID, composite_id: UUID | None = None, user_id: UUID | None = None):
         if composite_id:
-            stm = (update(Task)
-                   .where(and_(Task.task_id == task_id,
-                               Task.composite_id == composite_id,
-                               Task.task_status == ActiveObject.active))
-                   .values(task_status=ActiveObject.done).returning(Task))
+            criteria = and_(Task.task_id == task_id, Task.composite_id == composite_id)
         else:
-            stm = (update(Task)
-                   .where(and_(Task.task_id == task_id,
-                               Task.user_id == user_id,
-                               Task.task_status == ActiveObject.active))
-                   .values(task_status=ActiveObject.done).returning(Task))
+            criteria = and_(Task.task_id == task_id, Task.user_id == user_id)
+        tasks = await self._close_tasks_where(criteria)
+        return tasks[0]
+
+    @staticmethod
+    def _owned_by(user_id: UUID):
+        # = ANY(ARRAY(subquery)) runs the subquery once as an InitPlan, so both arms can use their index
+        # and be BitmapOr-ed; an IN (subquery) under OR is a hashed SubPlan checked on every row
+        composite_ids = func.array(select(Composite.composite_id).where(Composite.user_id == user_id)
+                                   .scalar_subquery(), type_=ARRAY(GUID()))
+        return or_(Task.user_id == user_id, Task.composite_id == any_(composite_ids))
+
+    @staticmethod
+    def _task_ids_param(task_ids: list[UUID]):
+        return any_(bindparam("task_ids", task_ids, type_=ARRAY(GUID())))
+
+    async def get_owned_composite_ids(self, user_id: UUID, composite_ids: set[UUID]) -> set[UUID]:
+        stm = select(Composite.composite_id).where(and_(Composite.user_id == user_id,
+                                                        Composite.composite_id.in_(composite_ids)))
         res = await self.db_session.execute(stm)
-        response = res.fetchone()
-        return response[0]
+        return set(res.scalars())
+
+    async def get_composite_summaries(self, user_id: UUID, composite_id: UUID | None = None):
+        stm = (select(Composite.composite_id, Composite.composite_name, Composite.composite_status,
+                      *(getattr(Composite, name) for name in COMPOSITE_COUNTERS))
+               .where(Composite.user_id == user_id))
+        if composite_id:
+            stm = stm.where(Composite.composite_id == composite_id)
+        res = await self.db_session.execute(stm.order_by(Composite.created_at, Composite.composite_id))
+        return res.all()
+
+    async def create_tasks(self, tasks: list[dict]) -> list[Task]:
+        if not tasks:
+            return []
+        stm = insert(Task).returning(Task, sort_by_parameter_order=True)
+        res = await self.db_session.scalars(stm, [{**task, "task_status": ActiveObject.active} for task in tasks])
+        created = list(res)
+        deltas: dict[UUID, Counter] = {}
+        for task in created:
+            if task.composite_id is not None:
+                deltas.setdefault(task.composite_id, Counter()).update(_task_counters(task.task_status,
+                                                                                      task.task_level))
+        await self._shift_counters(deltas)
+        return created
+
+    async def close_tasks(self, task_ids: list[UUID], user_id: UUID) -> list[UUID]:
+        tasks = await self._close_tasks_where(and_(Task.task_id == self._task_ids_param(task_ids),
+                                                   self._owned_by(user_id)))
+        return [task.task_id for task in tasks]
+
+    async def update_tasks(self, task_ids: list[UUID], user_id: UUID, **kwargs) -> list[UUID]:
+        rows = await self._update_tasks_where(and_(Task.task_id == self._task_ids_param(task_ids),
+                                                   self._owned_by(user_id)), kwargs)
+        return [task.task_id for task, _ in rows]
+
+    async def list_tasks_with_archive(self, user_id: UUID, composite_id: UUID | None = None,
+                                      after: KeysetCursor | None = None, limit: int = 50) -> list[Row]:
+        """``list_tasks`` over ``tasks`` and ``tasks_archive`` together, same keyset order; rows, not entities."""
+        parts = []
+        for task, composites in ((Task, (Composite,)), (TaskArchive, (Composite, CompositeArchive))):
+            if composite_id:
+                owned = or_(*(select(composite.composite_id)
+                              .where(composite.composite_id == composite_id, composite.user_id == user_id).exists()
+                              for composite in composites))
+                criteria = and_(task.composite_id == composite_id, owned)
+            else:
+                criteria = task.user_id == user_id
+            if after is not None:
+                criteria = and_(criteria, tuple_(task.created_at, task.task_id) > after)
+            parts.append(select(*(getattr(task, name) for name in TASK_COLUMNS)).where(criteria)
+                         .order_by(task.created_at, task.task_id).limit(limit))
+        tasks = union_all(*parts).subquery()
+        stm = select(tasks).order_by(tasks.c.created_at, tasks.c.task_id).limit(limit)
+        res = await self.db_session.execute(stm)
+        return res.all()
+
+    async def search(self, user_id: UUID, tsquery: str, after: RankCursor | None = None,
+                     limit: int = 50) -> list[Row]:
+        """The caller's tasks and composites matching ``tsquery``, best ``ts_rank`` first, ties by id.
+
+        Each side is ranked and cut to ``limit`` on its own GIN index before the two are merged.
+        """
+        query = func.to_tsquery(SEARCH_CONFIG, tsquery)
+        sources = (("task", Task, Task.task_id, Task.task_description, Task.task_status, self._owned_by(user_id)),
+                   ("composite", Composite, Composite.composite_id, Composite.composite_name,
+                    Composite.composite_status, Composite.user_id == user_id))
+        parts = []
+        for kind, entity, key, title, status, owned in sources:
+            rank = func.ts_rank(entity.search_vector, query)
+            criteria = and_(owned, entity.search_vector.bool_op("@@")(query))
+            if after is not None:
+                # ts_rank is real; a float8 bind would compare the widened rank and skip or repeat ties
+                after_rank, after_key = after
+                criteria = and_(criteria, tuple_(rank, key) < tuple_(cast(after_rank, REAL), after_key))
+            parts.append(select(literal(kind).label("kind"), key.label("object_id"), title.label("title"),
+                                status.label("status"), entity.created_at, rank.label("rank"))
+                         .where(criteria).order_by(rank.desc(), key.desc()).limit(limit))
+        found = union_all(*parts).subquery()
+        stm = select(found).order_by(found.c.rank.desc(), found.c.object_id.desc()).limit(limit)
+        res = await self.db_session.execute(stm)
+        return res.all()
+
+
+class DALArchive:
+
+    def __init__(self, db_session):
+        self.db_session: AsyncSession = db_session
+
+    async def _move(self, source, target, criteria, chunk_size: int, returning: tuple[str, ...] = ()) -> list:
+        """Move up to ``chunk_size`` matching rows in one DELETE ... RETURNING feeding an INSERT.
+
+        Returns a (key, *returning) row per moved row.
+        """
+        source_table, target_table = source.__table__, target.__table__
+        columns = [column.name for column in target_table.columns if column.name != "archived_at"]
+        key = source_table.primary_key.columns[0]
+        # rows another transaction holds are left for the next chunk instead of waited on
+        batch = select(key).where(criteria).limit(chunk_size).with_for_update(skip_locked=True)
+        moved = (delete(source_table).where(key.in_(batch.scalar_subquery()))
+                 .returning(*(source_table.c[name] for name in columns))
+                 .cte("moved"))
+        stm = (insert(target_table).from_select(columns, select(*(moved.c[name] for name in columns)))
+               .add_cte(moved)
+               .returning(*(target_table.c[name] for name in (key.name, *returning))))
+        res = await self.db_session.execute(stm)
+        return res.all()
+
+    @staticmethod
+    def _inactive_user_ids():
+        return select(User.user_id).where(User.is_active == False)
+
+    async def archive_tasks(self, chunk_size: int, done_before: datetime) -> int:
+        inactive_composites = select(Composite.composite_id).where(Composite.user_id.in_(self._inactive_user_ids()))
+        criteria = or_(Task.user_id.in_(self._inactive_user_ids()),
+                       Task.composite_id.in_(inactive_composites),
+                       and_(Task.task_status == ActiveObject.done,
+                            func.coalesce(Task.closed_at, Task.created_at) < done_before))
+        moved = await self._move(Task, TaskArchive, criteria, chunk_size,
+                                 returning=("composite_id", "task_status", "task_level"))
+        # composite counters only count tasks still in ``tasks``, so they drop in the same transaction
+        deltas: dict[UUID, Counter] = {}
+        for _, composite_id, task_status, task_level in moved:
+            if composite_id is not None:
+                deltas.setdefault(composite_id, Counter()).subtract(_task_counters(task_status, task_level))
+        await DALTask(self.db_session)._shift_counters(deltas)
+        return len(moved)
+
+    async def archive_composites(self, chunk_size: int, done_before: datetime) -> int:
+        """Only composites without tasks left in ``tasks``; run after ``archive_tasks``."""
+        criteria = and_(or_(Composite.user_id.in_(self._inactive_user_ids()),
+                            and_(Composite.composite_status == ActiveObject.done,
+                                 Composite.created_at < done_before)),
+                        ~select(Task.task_id).where(Task.composite_id == Composite.composite_id).exists())
+        return len(await self._move(Composite, CompositeArchive, criteria, chunk_size))
+
+    async def get_archived_tasks(self, composite_id: UUID) -> list[TaskArchive]:
+        stm = (select(TaskArchive).where(TaskArchive.composite_id == composite_id)
+               .order_by(TaskArchive.created_at, TaskArchive.task_id))
+        res = await self.db_session.execute(stm)
+        return list(res.scalars())
+
+    async def get_archived_composite(self, composite_id: UUID) -> CompositeArchive | None:
+        stm = (select(CompositeArchive).where(CompositeArchive.composite_id == composite_id)
+               .options(selectinload(CompositeArchive.tasks)))
+        res = await self.db_session.execute(stm)
+        return res.scalar_one_or_none()
@@ -1,7 +1,25 @@
+import itertools
+import time
 from typing import AsyncGenerator
 
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+from psycopg.errors import SerializationFailure
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
-from db_config import db_url_config, db_engine_config
+from db_config import db_url_config, db_engine_config, admission_config, AdmissionConfig, PrepareMode
+from monitoring import InstrumentedAsyncQueuePool, instrument_engine, instrument_statements
+from extentions import ERROR_409_CONCURRENT_UPDATE
+from .admission import AdmissionController
+from .hooks import has_written
+
+
+PRIMARY_STICKY_COOKIE = "xww-primary-until"
+# request.state key unit_of_work sets after committing a write
+PRIMARY_STICKY_STATE = "primary_sticky_until"
 
 
 class DataBaseHelper:
@@ -11,29 +29,200 @@ class DataBaseHelper:
                  echo: bool = False,
                  echo_pool: bool = False,
                  pool_size: int = 5,
-                 max_overflow: int = 10) -> None:
-        self.engine: AsyncEngine = create_async_engine(
+                 max_overflow: int = 10,
+                 replica_urls: list[str] | None = None,
+                 replica_stickiness: int = 5,
+                 prepare_mode: PrepareMode = "default",
+                 prepare_threshold: int = 0,
+                 prepared_max: int = 256,
+                 admission: AdmissionConfig | None = None) -> None:
+        self.url = url
+        self.replica_urls = list(replica_urls or ())
+        self.engine_options = dict(echo=echo, echo_pool=echo_pool, pool_size=pool_size, max_overflow=max_overflow,
+                                   prepare_mode=prepare_mode, prepare_threshold=prepare_threshold,
+                                   prepared_max=prepared_max)
+        self.replica_stickiness = replica_stickiness
+        self.admission = AdmissionController(capacity=pool_size + max_overflow,
+                                             config=admission or AdmissionConfig(enabled=False))
+        self.connected = False
+
+    def connect(self) -> None:
+        """Create the engines and session factories; called from the application lifespan."""
+        if self.connected:
+            return
+        self._engine = self.create_engine("primary", self.url, **self.engine_options)
+
+        self._session_factory = async_sessionmaker(
+            bind=self._engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False
+        )
+
+        # shares the pool; psycopg starts these transactions with BEGIN READ ONLY, no extra round trip
+        self._read_only_session_factory = async_sessionmaker(
+            bind=self._engine.execution_options(postgresql_readonly=True),
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False
+        )
+
+        self._replica_engines = [
+            self.create_engine(f"replica-{number}", replica_url, **self.engine_options)
+            for number, replica_url in enumerate(self.replica_urls)
+        ]
+        self._replica_session_factories = [
+            async_sessionmaker(
+                bind=replica_engine.execution_options(postgresql_readonly=True),
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+                info={"replica": True}
+            )
+            for replica_engine in self._replica_engines
+        ]
+        self._replica_factories = itertools.cycle(self._replica_session_factories)
+        self.connected = True
+
+    # built on first use; importing the module or handing out bound dependencies must not open pools
+    @property
+    def engine(self) -> AsyncEngine:
+        self.connect()
+        return self._engine
+
+    @property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        self.connect()
+        return self._session_factory
+
+    @property
+    def read_only_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        self.connect()
+        return self._read_only_session_factory
+
+    @property
+    def replica_engines(self) -> list[AsyncEngine]:
+        self.connect()
+        return self._replica_engines
+
+    @property
+    def replica_session_factories(self) -> list[async_sessionmaker[AsyncSession]]:
+        self.connect()
+        return self._replica_session_factories
+
+    @staticmethod
+    def create_engine(name: str,
+                      url: str,
+                      echo: bool = False,
+                      echo_pool: bool = False,
+                      pool_size: int = 5,
+                      max_overflow: int = 10,
+                      prepare_mode: PrepareMode = "default",
+                      prepare_threshold: int = 0,
+                      prepared_max: int = 256) -> AsyncEngine:
+        connect_args = {"options": "-c timezone=utc"}
+        if prepare_mode == "transaction_pooler":
+            # server connections change between transactions, a prepared name would not exist on the next one
+            connect_args["prepare_threshold"] = None
+        elif prepare_mode == "prepared":
+            connect_args["prepare_threshold"] = prepare_threshold
+
+        engine = create_async_engine(
             url=url,
             echo=echo,
             echo_pool=echo_pool,
             pool_size=pool_size,
             max_overflow=max_overflow,
-            connect_args={"options": "-c timezone=utc"}
+            poolclass=InstrumentedAsyncQueuePool,
+            connect_args=connect_args
         )
+        if prepare_mode == "prepared":
+            @event.listens_for(engine.sync_engine, "connect")
+            def set_prepared_max(dbapi_connection, connection_record):
+                connection_record.driver_connection.prepared_max = prepared_max
 
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False
-        )
+        instrument_engine(engine, name)
+        instrument_statements(engine)
+        return engine
 
     async def dispose(self) -> None:
-        await self.engine.dispose()
-        
-    async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
-        async with self.session_factory() as session:
-            yield session
+        if not self.connected:
+            return
+        await self._engine.dispose()
+        for replica_engine in self._replica_engines:
+            await replica_engine.dispose()
+
+    def read_session_factory(self, use_primary: bool = False) -> async_sessionmaker[AsyncSession]:
+        """Round-robin over the replicas, falling back to the read only primary factory."""
+        if use_primary or not self.replica_session_factories:
+            return self.read_only_session_factory
+        return next(self._replica_factories)
+
+    def _sticky_to_primary(self, request: Request) -> bool:
+        primary_until = request.cookies.get(PRIMARY_STICKY_COOKIE)
+        try:
+            return primary_until is not None and float(primary_until) > time.time()
+        except ValueError:
+            return False
+
+    async def session_getter(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        async with self.admission.admit(request):
+            async with self.session_factory() as session:
+                yield session
+
+    async def unit_of_work(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        """Request-scoped session running auth and CRUD in a single transaction."""
+        async with self.admission.admit(request):
+            async with self.session_factory() as session:
+                try:
+                    async with session.begin():
+                        yield session
+                except DBAPIError as error:
+                    # e.g. closing a task moves its row to tasks_done, and a concurrent write
+                    # to the old row fails instead of following it there
+                    if isinstance(error.orig, SerializationFailure):
+                        raise ERROR_409_CONCURRENT_UPDATE from error
+                    raise
+                # only reached once the commit succeeded; PrimaryStickyMiddleware turns it into the cookie
+                if self.replica_session_factories and has_written(session):
+                    setattr(request.state, PRIMARY_STICKY_STATE, int(time.time()) + self.replica_stickiness)
+
+    async def read_only_unit_of_work(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        """Same as ``unit_of_work`` but READ ONLY and served by a replica when one is configured."""
+        session_factory = self.read_session_factory(use_primary=self._sticky_to_primary(request))
+        async with self.admission.admit(request):
+            async with session_factory() as session:
+                async with session.begin():
+                    yield session
+
+
+class PrimaryStickyMiddleware:
+    """Read-your-writes: pins a client's reads to the primary for ``replica_stickiness`` seconds after a write.
+
+    The cookie is set here rather than in ``unit_of_work`` because FastAPI copies
+    dependency headers into the response before the transaction commits.
+    """
+
+    def __init__(self, app: ASGIApp, stickiness: int) -> None:
+        self.app = app
+        self.stickiness = stickiness
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                primary_until = scope.get("state", {}).get(PRIMARY_STICKY_STATE)
+                if primary_until is not None:
+                    cookie = Response()
+                    cookie.set_cookie(key=PRIMARY_STICKY_COOKIE, value=str(primary_until),
+                                      max_age=self.stickiness, httponly=True)
+                    MutableHeaders(scope=message).append("set-cookie", cookie.headers["set-cookie"])
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
 
 
 db_helper = DataBaseHelper(
@@ -41,5 +230,11 @@ db_helper = DataBaseHelper(
     echo=db_engine_config.echo,
     echo_pool=db_engine_config.echo_pool,
     pool_size=db_engine_config.pool_size,
-    max_overflow=db_engine_config.max_overflow
+    max_overflow=db_engine_config.max_overflow,
+    replica_urls=db_url_config.DATABASE_URLS_replicas,
+    replica_stickiness=db_engine_config.replica_stickiness,
+    prepare_mode=db_engine_config.prepare_mode,
+    prepare_threshold=db_engine_config.prepare_threshold,
+    prepared_max=db_engine_config.prepared_max,
+    admission=admission_config
 )
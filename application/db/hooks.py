@@ -0,0 +1,48 @@
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session, ORMExecuteState
+
+
+_AFTER_COMMIT = "after_commit_callbacks"
+_WROTE = "wrote"
+
+
+def after_commit(session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's transaction has committed; a rollback drops it.
+
+    For in-process state (caches, revocation lists) that must never get
+    ahead of what other transactions can read.
+    """
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+def has_written(session) -> bool:
+    """Whether the session flushed or executed an INSERT, UPDATE or DELETE."""
+    return session.info.get(_WROTE, False)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT, ()):
+        try:
+            callback()
+        except Exception:
+            logger.exception("after commit callback failed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit(session: Session) -> None:
+    session.info.pop(_AFTER_COMMIT, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
@@ -0,0 +1,164 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_config import pending_signup_config, PendingSignUpConfig
+from .dals import DALAuth
+from .engine import db_helper
+
+
+@dataclass(frozen=True, slots=True)
+class PendingSignUp:
+    pair_id: UUID
+    phone_number: str
+    first_name: str
+    last_name: str
+    identity_number: int
+
+
+class VerificationStatus(str, Enum):
+    verified = "verified"
+    mismatch = "mismatch"
+    # unknown, expired or out of attempts
+    missing = "missing"
+
+
+class PendingSignUpStore(ABC):
+    """Sign-ups waiting for their identity number, each living for ``ttl`` seconds.
+
+    Methods take the request session so the Postgres backend joins the
+    request's transaction; the memory backend ignores it. A ``mismatch``
+    has already counted the attempt in that transaction, so the caller
+    must let it commit rather than raise.
+
+    """
+
+    def __init__(self, ttl: int, max_attempts: int) -> None:
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    async def add(self, session: AsyncSession, phone_number: str, first_name: str, last_name: str,
+                  identity_number: int) -> UUID:
+        ...
+
+    @abstractmethod
+    async def consume(self, session: AsyncSession, pair_id: UUID,
+                      identity_number: int) -> tuple[VerificationStatus, PendingSignUp | None]:
+        """Remove and return the entry when ``identity_number`` matches, otherwise count the attempt."""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        ...
+
+    async def run(self, interval: float) -> None:
+        """Sweep expired entries every ``interval`` seconds; a failed sweep is logged and tried again next tick."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                swept = await self.sweep()
+                if swept:
+                    logger.info("swept {} expired pending sign-ups", swept)
+            except Exception:
+                logger.exception("pending sign-up sweep failed")
+
+
+class MemoryPendingSignUpStore(PendingSignUpStore):
+
+    def __init__(self, ttl: int, max_attempts: int, max_entries: int) -> None:
+        super().__init__(ttl, max_attempts)
+        self.max_entries = max_entries
+        # one ttl for everybody, so insertion order is expiry order
+        self._entries: OrderedDict[UUID, list] = OrderedDict()
+
+    async def add(self, session: AsyncSession, phone_number: str, first_name: str, last_name: str,
+                  identity_number: int) -> UUID:
+        await self.sweep()
+        pair_id = uuid.uuid4()
+        entry = PendingSignUp(pair_id=pair_id, phone_number=phone_number, first_name=first_name,
+                              last_name=last_name, identity_number=identity_number)
+        self._entries[pair_id] = [time.monotonic() + self.ttl, 0, entry]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return pair_id
+
+    async def consume(self, session: AsyncSession, pair_id: UUID,
+                      identity_number: int) -> tuple[VerificationStatus, PendingSignUp | None]:
+        # no awaits below: check and removal happen without yielding to another request
+        record = self._entries.get(pair_id)
+        if record is None or record[0] <= time.monotonic() or record[1] >= self.max_attempts:
+            return VerificationStatus.missing, None
+        if record[2].identity_number != identity_number:
+            record[1] += 1
+            return VerificationStatus.mismatch, None
+        del self._entries[pair_id]
+        return VerificationStatus.verified, record[2]
+
+    async def sweep(self) -> int:
+        now = time.monotonic()
+        swept = 0
+        while self._entries:
+            pair_id, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[pair_id]
+            swept += 1
+        return swept
+
+
+class PostgresPendingSignUpStore(PendingSignUpStore):
+    """Keeps pending sign-ups in ``auth_users``; works across workers."""
+
+    def __init__(self, ttl: int, max_attempts: int, chunk_size: int) -> None:
+        super().__init__(ttl, max_attempts)
+        self.chunk_size = chunk_size
+
+    async def add(self, session: AsyncSession, phone_number: str, first_name: str, last_name: str,
+                  identity_number: int) -> UUID:
+        return await DALAuth(session).add_new_pair(phone_number=phone_number, first_name=first_name,
+                                                   last_name=last_name, identity_number=identity_number)
+
+    async def consume(self, session: AsyncSession, pair_id: UUID,
+                      identity_number: int) -> tuple[VerificationStatus, PendingSignUp | None]:
+        auth_dal = DALAuth(session)
+        pair = await auth_dal.consume_pair(pair_id, identity_number=identity_number, max_attempts=self.max_attempts)
+        if pair is not None:
+            return VerificationStatus.verified, PendingSignUp(pair_id=pair.auth_id, phone_number=pair.phone_number,
+                                                              first_name=pair.first_name,
+                                                              last_name=pair.last_name,
+                                                              identity_number=pair.identity_number)
+        # same transaction, no second pooled connection: it only sticks if the request commits
+        counted = await auth_dal.register_failed_attempt(pair_id, max_attempts=self.max_attempts)
+        if counted:
+            return VerificationStatus.mismatch, None
+        return VerificationStatus.missing, None
+
+    async def sweep(self) -> int:
+        """Delete in ``chunk_size`` transactions so the sweep never holds many row locks at once."""
+        swept = 0
+        while True:
+            async with db_helper.session_factory() as session:
+                async with session.begin():
+                    deleted = await DALAuth(session).delete_expired(self.chunk_size)
+            swept += deleted
+            if deleted < self.chunk_size:
+                return swept
+
+
+def build_pending_store(config: PendingSignUpConfig) -> PendingSignUpStore:
+    if config.backend == "postgres":
+        return PostgresPendingSignUpStore(ttl=config.ttl, max_attempts=config.max_attempts,
+                                          chunk_size=config.sweep_chunk_size)
+    return MemoryPendingSignUpStore(ttl=config.ttl, max_attempts=config.max_attempts,
+                                    max_entries=config.max_entries)
+
+
+pending_signups = build_pending_store(pending_signup_config)
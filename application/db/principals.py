@@ -0,0 +1,85 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from db_config import principal_cache_config
+from .schemas import User, PortalRoles
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Compact snapshot of the authenticated user.
+
+    Holds only what the permission checks need, so it can be cached
+    between requests without keeping ORM objects alive.
+
+    """
+
+    user_id: UUID
+    roles: tuple[str, ...]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user_id=user.user_id, roles=tuple(user.roles or ()), is_active=user.is_active)
+
+    @property
+    def is_owner(self):
+        return PortalRoles.ROLE_PORTAL_OWNER in self.roles
+
+    @property
+    def is_admin(self):
+        return PortalRoles.ROLE_PORTAL_ADMIN in self.roles
+
+
+class PrincipalCache:
+    """LRU cache of principals keyed by the token ``sub`` claim.
+
+    Entries live for ``ttl`` seconds but never longer than the token
+    they were resolved from.
+
+    """
+
+    def __init__(self, ttl: int, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        # bumped by every invalidation, see ``set``
+        self.generation = 0
+
+    def get(self, user_id: str | UUID) -> Principal | None:
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def set(self, principal: Principal, token_exp: float | None = None, generation: int | None = None) -> None:
+        """``generation`` is the value read before loading ``principal``; if an invalidation
+        happened since, the row may predate it and is not cached."""
+        if generation is not None and generation != self.generation:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        key = str(principal.user_id)
+        self._entries[key] = (expires_at, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str | UUID) -> None:
+        self.generation += 1
+        self._entries.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(ttl=principal_cache_config.ttl, max_size=principal_cache_config.max_size)
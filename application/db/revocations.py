@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from loguru import logger
+
+from db_config import revocation_config
+from .dals import DALRevokedToken
+from .engine import db_helper
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over strings; no deletes, rebuild it instead."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return ((first + number * second) % self.size for number in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """In-process view of ``revoked_tokens``.
+
+    ``is_revoked`` never touches the database: the Bloom filter answers the
+    common "not revoked" case and the exact set settles its false positives.
+    Tokens revoked by other workers show up after at most ``sync_interval``.
+
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._revoked: dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._watermark: datetime | None = None
+
+    def is_revoked(self, jti: str | None) -> bool:
+        if jti is None or jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, jti: str | UUID, expires_at: datetime) -> None:
+        key = str(jti)
+        self._revoked[key] = expires_at.replace(tzinfo=expires_at.tzinfo or timezone.utc).timestamp()
+        self._bloom.add(key)
+
+    def replace(self, rows: list[tuple[UUID, datetime, datetime]]) -> None:
+        """Swap in a full snapshot, dropping expired entries from the filter."""
+        self._revoked = {}
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        self._watermark = None
+        self.merge(rows)
+
+    def merge(self, rows: list[tuple[UUID, datetime, datetime]]) -> None:
+        for jti, expires_at, revoked_at in rows:
+            self.add(jti, expires_at)
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+
+    async def refresh(self, full: bool = False) -> None:
+        since = None
+        if not full and self._watermark is not None:
+            since = self._watermark - timedelta(seconds=revocation_config.sync_overlap)
+        async with db_helper.session_factory() as session:
+            rows = await DALRevokedToken(session).get_revoked(since=since)
+        if since is None:
+            self.replace(rows)
+        else:
+            self.merge(rows)
+
+    async def prune(self) -> None:
+        async with db_helper.session_factory() as session:
+            async with session.begin():
+                pruned = await DALRevokedToken(session).prune()
+        if pruned:
+            logger.info("pruned {} expired revoked tokens", pruned)
+        await self.refresh(full=True)
+
+    async def run(self, sync_interval: float, prune_interval: float) -> None:
+        """Load the full list once, then pull new revocations every ``sync_interval`` and prune on its own clock."""
+        loaded = False
+        next_prune = time.monotonic() + prune_interval
+        while True:
+            try:
+                if not loaded:
+                    # retried every interval until the database is reachable
+                    await self.refresh(full=True)
+                    loaded = True
+                elif time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + prune_interval
+                    await self.prune()
+                else:
+                    await self.refresh()
+            except Exception:
+                logger.exception("revoked tokens sync failed")
+            await asyncio.sleep(sync_interval)
+
+
+revocation_list = RevocationList(capacity=revocation_config.capacity, error_rate=revocation_config.error_rate)
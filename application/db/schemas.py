@@ -2,10 +2,10 @@ from typing import TYPE_CHECKING
 
 import uuid
 from operator import attrgetter
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import String, Column, Text, MetaData, text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, Column, Text, MetaData, text, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import TypeDecorator, CHAR
@@ -13,7 +13,12 @@ from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.engine.default import DefaultExecutionContext
 from sqlalchemy.sql import func
 from enum import Enum
-from db_config import sqlalchemy_config
+from db_config import sqlalchemy_config, pending_signup_config
+
+
+# text search configuration of the generated search_vector columns; queries must use the same one.
+# "simple" only lowercases, so prefix matching sees the words as typed, in any language
+SEARCH_CONFIG = "simple"
 
 
 class PortalRoles(str, Enum):
@@ -102,10 +107,12 @@ class User(Base):
     email: Mapped[str | None] = mapped_column(nullable=True, unique=True)
     roles = Column(ARRAY(String), nullable=True)
     is_active: Mapped[bool]
+    # bumped by every DAL write to the row; the ETag / If-Match source
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
     # roles: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=True)
 
-    composites: Mapped[list["Composite"]] = relationship(back_populates="user", lazy="selectin")
-    tasks: Mapped[list["Task"]] = relationship(back_populates="user", lazy="selectin")
+    composites: Mapped[list["Composite"]] = relationship(back_populates="user", lazy="noload")
+    tasks: Mapped[list["Task"]] = relationship(back_populates="user", lazy="noload")
 
     @property
     def is_owner(self):
@@ -130,15 +137,35 @@ class User(Base):
 class AuthUser(Base):
     __tablename__ = "auth_users"
 
+    @staticmethod
+    def get_expiry():
+        return datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=pending_signup_config.ttl)
+
     auth_id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     phone_number: Mapped[str] = mapped_column(nullable=False)
     first_name: Mapped[str] = mapped_column(nullable=False)
     last_name: Mapped[str] = mapped_column(nullable=False)
     identity_number: Mapped[int] = mapped_column(nullable=False)
+    # pending sign-ups only; swept by db.pending once expired
+    expires_at: Mapped[datetime] = mapped_column(default=get_expiry, index=True)
+    attempts: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    # rows are useless once the token would have expired anyway
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+    revoked_at: Mapped[datetime] = mapped_column(server_default=func.now(), index=True)
 
 
 class Composite(Base):
     __tablename__ = "composites"
+    __table_args__ = (
+        Index("ix_composites_user_id_created_at", "user_id", "created_at", "composite_id"),
+        Index("ix_composites_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     @staticmethod
     def get_time():
@@ -150,13 +177,37 @@ class Composite(Base):
     created_at: Mapped[datetime] = mapped_column(default=get_time)
     composite_status: Mapped[ActiveObject]
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(column="users.user_id"))
+    # bumped on writes to the composite's own fields, not on counter shifts
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+
+    # maintained by DALTask alongside every task mutation, and by DALArchive as tasks leave for tasks_archive
+    open_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    done_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    free_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    optimal_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+    urgent_count: Mapped[int] = mapped_column(default=0, server_default=text("0"))
+
+    # deferred: only the search query reads it
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(f"setweight(to_tsvector('{SEARCH_CONFIG}', composite_name), 'A') || "
+                           f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(composite_description, '')), 'B')",
+                           persisted=True),
+        deferred=True)
 
-    user: Mapped["User"] = relationship(back_populates="composites", lazy="selectin")
-    tasks: Mapped[list["Task"]] = relationship(back_populates='composite', lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="composites", lazy="noload")
+    tasks: Mapped[list["Task"]] = relationship(back_populates='composite', lazy="noload")
 
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index("ix_tasks_user_id_created_at", "user_id", "created_at", "task_id"),
+        Index("ix_tasks_composite_id_created_at", "composite_id", "created_at", "task_id"),
+        Index("ix_tasks_user_id_active", "user_id", postgresql_where=text("task_status = 'active'")),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # one partition per status, see migration 4e9b1d7c3a58; closing a task moves its row
+        {"postgresql_partition_by": "LIST (task_status)"},
+    )
 
     @staticmethod
     def get_time():
@@ -176,11 +227,64 @@ class Task(Base):
     composite_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(column="composites.composite_id"), nullable=True)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey(column="users.user_id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=get_time)
-    task_status: Mapped[ActiveObject]
+    # part of the primary key only because Postgres requires the partition key there
+    task_status: Mapped[ActiveObject] = mapped_column(primary_key=True)
     closed_at: Mapped[datetime] = mapped_column(nullable=True, onupdate=close_task)
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"))
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', task_description)", persisted=True), deferred=True)
+
+    # identity stays task_id alone, so a status change does not turn a task into another object
+    __mapper_args__ = {"primary_key": [task_id]}
+
+    composite: Mapped["Composite"] = relationship(back_populates="tasks", lazy="noload")
+    user: Mapped["User"] = relationship(back_populates="tasks", lazy="noload")
 
-    composite: Mapped["Composite"] = relationship(back_populates="tasks", lazy="selectin")
-    user: Mapped["User"] = relationship(back_populates="tasks", lazy="selectin")
 
+class CompositeArchive(Base):
+    """Cold copy of ``composites`` rows moved out by db.archive; no foreign keys, nothing writes here but the job."""
 
+    __tablename__ = "composites_archive"
+    __table_args__ = (
+        Index("ix_composites_archive_user_id_created_at", "user_id", "created_at", "composite_id"),
+    )
 
+    composite_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    composite_name: Mapped[str] = mapped_column(nullable=False)
+    composite_description: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime]
+    composite_status: Mapped[ActiveObject]
+    user_id: Mapped[uuid.UUID]
+    version: Mapped[int]
+    # counters only count live tasks, which are all archived by the time the composite is
+    open_count: Mapped[int]
+    done_count: Mapped[int]
+    free_count: Mapped[int]
+    optimal_count: Mapped[int]
+    urgent_count: Mapped[int]
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now())
+
+    tasks: Mapped[list["TaskArchive"]] = relationship(
+        primaryjoin="CompositeArchive.composite_id == foreign(TaskArchive.composite_id)", lazy="noload",
+        viewonly=True)
+
+
+class TaskArchive(Base):
+    """Cold copy of ``tasks`` rows, same columns plus ``archived_at``."""
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_user_id_created_at", "user_id", "created_at", "task_id"),
+        Index("ix_tasks_archive_composite_id_created_at", "composite_id", "created_at", "task_id"),
+    )
+
+    task_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    task_description: Mapped[str] = mapped_column(Text, nullable=False)
+    task_level: Mapped[TaskLevel]
+    composite_id: Mapped[uuid.UUID] = mapped_column(nullable=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(nullable=True)
+    created_at: Mapped[datetime]
+    task_status: Mapped[ActiveObject]
+    closed_at: Mapped[datetime] = mapped_column(nullable=True)
+    version: Mapped[int]
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now())
@@ -1,5 +1,13 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import PostgresDsn
+from pydantic import BaseModel, PostgresDsn
+
+
+# "default": psycopg prepares a query after 5 executions
+# "prepared": prepare after ``prepare_threshold`` executions and keep up to ``prepared_max`` per connection
+# "transaction_pooler": never prepare; required behind PgBouncer/odyssey in transaction pooling mode
+PrepareMode = Literal["default", "prepared", "transaction_pooler"]
 
 
 class DatabaseURLConfig(BaseSettings):
@@ -8,11 +16,21 @@ class DatabaseURLConfig(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DB_NAME: str
+    DB_REPLICA_HOSTS: list[str] = []
 
     @property
     def DATABASE_URL_psycopg(self) -> PostgresDsn:
         return f'postgresql+psycopg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
 
+    @property
+    def DATABASE_URLS_replicas(self) -> list[PostgresDsn]:
+        """``DB_REPLICA_HOSTS`` entries are ``host`` or ``host:port`` sharing the primary credentials."""
+        urls = []
+        for host in self.DB_REPLICA_HOSTS:
+            address = host if ":" in host else f'{host}:{self.DB_PORT}'
+            urls.append(f'postgresql+psycopg://{self.DB_USER}:{self.DB_PASS}@{address}/{self.DB_NAME}')
+        return urls
+
     @property
     def DATABASE_URL_alembic(self) -> PostgresDsn:
         return f'postgresql+psycopg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
@@ -25,6 +43,88 @@ class DatabaseEngineConfig(BaseSettings):
     echo_pool: bool = False
     pool_size: int = 10
     max_overflow: int = 5
+    replica_stickiness: int = 5
+    prepare_mode: PrepareMode = "default"
+    prepare_threshold: int = 0
+    prepared_max: int = 256
+
+
+class PrincipalCacheConfig(BaseSettings):
+    ttl: int = 60
+    max_size: int = 10_000
+
+
+class RevocationConfig(BaseSettings):
+    # expected number of unexpired revoked tokens and the Bloom filter false-positive rate at that size
+    capacity: int = 100_000
+    error_rate: float = 0.001
+    # seconds between pulls of newly revoked tokens from other workers
+    sync_interval: float = 5
+    # re-read rows revoked this many seconds before the last seen one, covers slow committing transactions
+    sync_overlap: float = 30
+    # seconds between deleting expired rows and rebuilding the filter
+    prune_interval: float = 300
+
+    model_config = SettingsConfigDict(env_prefix="REVOCATION_")
+
+
+class PendingSignUpConfig(BaseSettings):
+    # "memory" only works with a single worker: verification must hit the process that issued the pair
+    backend: Literal["memory", "postgres"] = "memory"
+    ttl: int = 900
+    max_attempts: int = 5
+    # memory backend: oldest pending sign-ups are dropped beyond this
+    max_entries: int = 100_000
+    sweep_interval: float = 60
+    # postgres backend: rows deleted per statement while sweeping
+    sweep_chunk_size: int = 1_000
+
+    model_config = SettingsConfigDict(env_prefix="SIGNUP_")
+
+
+class AdmissionClass(BaseModel):
+    # lower is served first when a connection frees up
+    priority: int
+    max_concurrency: int
+    # seconds a request may wait for admission before it gets a 503
+    queue_timeout: float
+
+
+class AdmissionConfig(BaseSettings):
+    enabled: bool = True
+    classes: dict[str, AdmissionClass] = {
+        "auth": AdmissionClass(priority=0, max_concurrency=20, queue_timeout=0.5),
+        "read": AdmissionClass(priority=1, max_concurrency=40, queue_timeout=1.0),
+        "write": AdmissionClass(priority=2, max_concurrency=30, queue_timeout=2.0),
+        "bulk": AdmissionClass(priority=3, max_concurrency=5, queue_timeout=5.0),
+    }
+    # "METHOD template" or bare template (any method) -> class; anything else is "read" for GET and "write" otherwise
+    routes: dict[str, str] = {
+        "/api/v1/auth/refresh": "auth",
+        "/api/v1/auth/registration": "auth",
+        "/api/v1/auth/registration/verify": "auth",
+        "/api/v1/auth/get-token": "auth",
+        "/api/v1/auth/logout": "auth",
+        "POST /api/v1/task/bulk": "bulk",
+        "PATCH /api/v1/task/bulk": "bulk",
+        "POST /api/v1/task/bulk/close": "bulk",
+    }
+
+    model_config = SettingsConfigDict(env_prefix="ADMISSION_")
+
+
+class ArchiveConfig(BaseSettings):
+    enabled: bool = False
+    # done tasks closed (and done composites created) longer ago than this are archived
+    done_age_days: int = 90
+    # rows moved per transaction, and the pause between transactions
+    chunk_size: int = 500
+    pause: float = 0.2
+    # a chunk that would wait longer than this for a lock is abandoned until the next pass
+    lock_timeout_ms: int = 2_000
+    interval: float = 3_600
+
+    model_config = SettingsConfigDict(env_prefix="ARCHIVE_")
 
 
 class SQLAlchemyConfig(BaseSettings):
@@ -39,5 +139,10 @@ class SQLAlchemyConfig(BaseSettings):
 
 
 db_url_config = DatabaseURLConfig()
-db_engine_config = DatabaseEngineConfig(echo=True, pool_size=50, max_overflow=10)
+db_engine_config = DatabaseEngineConfig(pool_size=50, max_overflow=10)
 sqlalchemy_config = SQLAlchemyConfig()
+principal_cache_config = PrincipalCacheConfig()
+revocation_config = RevocationConfig()
+pending_signup_config = PendingSignUpConfig()
+admission_config = AdmissionConfig()
+archive_config = ArchiveConfig()
@@ -5,10 +5,18 @@ ERROR_403_FORBIDDEN = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detai
 ERROR_401_UNAUTHORIZED = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid Token')
 ERROR_406_NOT_ACCEPTABLE = HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f'Not Acceptable')
 ERROR_409_CONFLICT = HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Conflict')
+ERROR_409_CONCURRENT_UPDATE = HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                            detail='Resource was changed by a concurrent request, retry')
 ERROR_404_USER_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User with id {id} not found')
 ERROR_404_PAIR_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Pair with {id} not found')
+ERROR_412_PRECONDITION_FAILED = HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED,
+                                              detail='Resource was modified, fetch it again')
+ERROR_503_SERVICE_UNAVAILABLE = HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                              detail='Service Unavailable', headers={"Retry-After": "1"})
 ERROR_422_UNPROCESSABLE_ENTITY = HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                                                detail='Unprocessable Entity')
 
 ERROR_404_COMPOSITE_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                               detail='Composite with {id} not found')
+ERROR_404_TASK_NOT_FOUND = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Task not found')
+ERROR_409_COMPOSITE_CLOSED = HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Composite is already closed')
@@ -0,0 +1,17 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class LoggingConfig(BaseSettings):
+    level: str = "INFO"
+    # None writes to stdout
+    path: str | None = None
+    queue_size: int = 10_000
+    # logger name prefix -> minimum level, e.g. {"sqlalchemy.engine": "INFO"} to get statement logs back
+    levels: dict[str, str] = {"sqlalchemy": "WARNING", "uvicorn.access": "WARNING"}
+    # event name bound with logger.bind(event=...) -> fraction of records kept
+    sampling: dict[str, float] = {"sql_budget": 0.1}
+
+    model_config = SettingsConfigDict(env_prefix="LOG_")
+
+
+logging_config = LoggingConfig()
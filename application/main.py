@@ -1,23 +1,47 @@
+import sys
+
 from fastapi import FastAPI
-from fastapi.responses import ORJSONResponse
-import uvicorn
 
-from api import main_api_router
-from app_manager import lifespan
 from app_config import app_config
-from app_manager import router as ping_router
 
 
 """ FastAPI APPLICATION """
 
 
-app = FastAPI(title="FastAPI", description="Fastapi Interface Document", version="1.0.0",
-              default_response_class=ORJSONResponse,
-              lifespan=lifespan)
+def create_app() -> FastAPI:
+    """Build the application; the engine is created by ``lifespan``, not here."""
+    from fastapi.responses import ORJSONResponse
+
+    from api import main_api_router
+    from app_manager import lifespan, setup_docs
+    from app_manager import router as ping_router
+    from log_config import logging_config
+    from monitoring import MetricsMiddleware, StatementAccountingMiddleware, setup_logging
+    from security import RateLimitMiddleware
+    from db import PrimaryStickyMiddleware
+    from db_config import db_engine_config
+
+    app = FastAPI(title="FastAPI", description="Fastapi Interface Document", version="1.0.0",
+                  default_response_class=ORJSONResponse,
+                  lifespan=lifespan,
+                  docs_url=None)
+    app.state.log_sink = setup_logging(logging_config)
+
+    app.add_middleware(PrimaryStickyMiddleware, stickiness=db_engine_config.replica_stickiness)
+    app.add_middleware(StatementAccountingMiddleware)
+    app.add_middleware(RateLimitMiddleware, settings=app_config.rate_limit)
+    app.add_middleware(MetricsMiddleware)
 
+    app.include_router(ping_router)
+    app.include_router(main_api_router)
+    setup_docs(app, app_config.docs)
+    return app
 
-app.include_router(ping_router)
-app.include_router(main_api_router)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=app_config.run.HOST, port=app_config.run.PORT)
+    if sys.argv[1:2] == ["openapi"]:
+        from app_manager import write_openapi
+        write_openapi(create_app(), app_config.docs.OPENAPI_PATH)
+    else:
+        import uvicorn
+        uvicorn.run("main:create_app", factory=True, host=app_config.run.HOST, port=app_config.run.PORT)
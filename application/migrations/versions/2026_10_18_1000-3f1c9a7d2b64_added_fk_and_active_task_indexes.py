@@ -0,0 +1,47 @@
+"""added fk and active task indexes
+
+Revision ID: 3f1c9a7d2b64
+Revises: 65005326fcdf
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '65005326fcdf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FK columns lead every index, so they also serve the (created_at, id) keyset pagination
+    with op.get_context().autocommit_block():
+        op.create_index('ix_composites_user_id_created_at', 'composites',
+                        ['user_id', 'created_at', 'composite_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_user_id_created_at', 'tasks',
+                        ['user_id', 'created_at', 'task_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_composite_id_created_at', 'tasks',
+                        ['composite_id', 'created_at', 'task_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_user_id_active', 'tasks', ['user_id'], unique=False,
+                        postgresql_where=sa.text("task_status = 'active'"),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_user_id_active', table_name='tasks',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_composite_id_created_at', table_name='tasks',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_user_id_created_at', table_name='tasks',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_composites_user_id_created_at', table_name='composites',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,50 @@
+"""added task counters to composites
+
+Revision ID: 8e2d4b6c1a93
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d4b6c1a93'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = ('open_count', 'done_count', 'free_count', 'optimal_count', 'urgent_count')
+
+
+def upgrade() -> None:
+    for counter in COUNTERS:
+        op.add_column('composites', sa.Column(counter, sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.execute("""
+        UPDATE composites AS c
+        SET open_count = t.open_count,
+            done_count = t.done_count,
+            free_count = t.free_count,
+            optimal_count = t.optimal_count,
+            urgent_count = t.urgent_count
+        FROM (
+            SELECT composite_id,
+                   count(*) FILTER (WHERE task_status = 'active') AS open_count,
+                   count(*) FILTER (WHERE task_status = 'done') AS done_count,
+                   count(*) FILTER (WHERE task_level = 'free') AS free_count,
+                   count(*) FILTER (WHERE task_level = 'optimal') AS optimal_count,
+                   count(*) FILTER (WHERE task_level = 'urgent') AS urgent_count
+            FROM tasks
+            WHERE composite_id IS NOT NULL
+            GROUP BY composite_id
+        ) AS t
+        WHERE c.composite_id = t.composite_id
+    """)
+
+
+def downgrade() -> None:
+    for counter in reversed(COUNTERS):
+        op.drop_column('composites', counter)
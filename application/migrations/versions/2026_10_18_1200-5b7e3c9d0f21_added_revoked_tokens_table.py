@@ -0,0 +1,36 @@
+"""added revoked tokens table
+
+Revision ID: 5b7e3c9d0f21
+Revises: 8e2d4b6c1a93
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import db.schemas
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e3c9d0f21'
+down_revision: Union[str, None] = '8e2d4b6c1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('revoked_tokens',
+                    sa.Column('jti', db.schemas.GUID(), nullable=False),
+                    sa.Column('expires_at', sa.DateTime(), nullable=False),
+                    sa.Column('revoked_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('jti', name=op.f('pk_revoked_tokens'))
+                    )
+    op.create_index(op.f('ix_revoked_tokens_expires_at'), 'revoked_tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_revoked_tokens_revoked_at'), 'revoked_tokens', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_tokens_revoked_at'), table_name='revoked_tokens')
+    op.drop_index(op.f('ix_revoked_tokens_expires_at'), table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
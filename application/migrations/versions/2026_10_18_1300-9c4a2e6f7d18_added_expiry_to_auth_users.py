@@ -0,0 +1,33 @@
+"""added expiry and attempts to auth users
+
+Revision ID: 9c4a2e6f7d18
+Revises: 5b7e3c9d0f21
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4a2e6f7d18'
+down_revision: Union[str, None] = '5b7e3c9d0f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # rows left over from before the expiry existed are expired straight away and swept
+    op.add_column('auth_users', sa.Column('expires_at', sa.DateTime(), server_default=sa.text('now()'),
+                                          nullable=False))
+    op.alter_column('auth_users', 'expires_at', server_default=None)
+    op.add_column('auth_users', sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_index(op.f('ix_auth_users_expires_at'), 'auth_users', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_auth_users_expires_at'), table_name='auth_users')
+    op.drop_column('auth_users', 'attempts')
+    op.drop_column('auth_users', 'expires_at')
@@ -0,0 +1,69 @@
+"""added archive tables for composites and tasks
+
+Revision ID: 7a3c5e9f1b26
+Revises: 2d8f6a1b4e57
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import db.schemas
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c5e9f1b26'
+down_revision: Union[str, None] = '2d8f6a1b4e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+activeobject = postgresql.ENUM('active', 'done', name='activeobject', create_type=False)
+tasklevel = postgresql.ENUM('free', 'optimal', 'urgent', name='tasklevel', create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table('composites_archive',
+                    sa.Column('composite_id', db.schemas.GUID(), nullable=False),
+                    sa.Column('composite_name', sa.String(), nullable=False),
+                    sa.Column('composite_description', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.Column('composite_status', activeobject, nullable=False),
+                    sa.Column('user_id', db.schemas.GUID(), nullable=False),
+                    sa.Column('version', sa.Integer(), nullable=False),
+                    sa.Column('open_count', sa.Integer(), nullable=False),
+                    sa.Column('done_count', sa.Integer(), nullable=False),
+                    sa.Column('free_count', sa.Integer(), nullable=False),
+                    sa.Column('optimal_count', sa.Integer(), nullable=False),
+                    sa.Column('urgent_count', sa.Integer(), nullable=False),
+                    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('composite_id', name=op.f('pk_composites_archive'))
+                    )
+    op.create_index('ix_composites_archive_user_id_created_at', 'composites_archive',
+                    ['user_id', 'created_at', 'composite_id'], unique=False)
+    op.create_table('tasks_archive',
+                    sa.Column('task_id', db.schemas.GUID(), nullable=False),
+                    sa.Column('task_description', sa.Text(), nullable=False),
+                    sa.Column('task_level', tasklevel, nullable=False),
+                    sa.Column('composite_id', db.schemas.GUID(), nullable=True),
+                    sa.Column('user_id', db.schemas.GUID(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.Column('task_status', activeobject, nullable=False),
+                    sa.Column('closed_at', sa.DateTime(), nullable=True),
+                    sa.Column('version', sa.Integer(), nullable=False),
+                    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('task_id', name=op.f('pk_tasks_archive'))
+                    )
+    op.create_index('ix_tasks_archive_user_id_created_at', 'tasks_archive',
+                    ['user_id', 'created_at', 'task_id'], unique=False)
+    op.create_index('ix_tasks_archive_composite_id_created_at', 'tasks_archive',
+                    ['composite_id', 'created_at', 'task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_archive_composite_id_created_at', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_user_id_created_at', table_name='tasks_archive')
+    op.drop_table('tasks_archive')
+    op.drop_index('ix_composites_archive_user_id_created_at', table_name='composites_archive')
+    op.drop_table('composites_archive')
@@ -0,0 +1,95 @@
+"""partitioned tasks by task_status
+
+Revision ID: 4e9b1d7c3a58
+Revises: 7a3c5e9f1b26
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import db.schemas
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9b1d7c3a58'
+down_revision: Union[str, None] = '7a3c5e9f1b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+activeobject = postgresql.ENUM('active', 'done', name='activeobject', create_type=False)
+tasklevel = postgresql.ENUM('free', 'optimal', 'urgent', name='tasklevel', create_type=False)
+
+COLUMNS = ('task_id', 'task_description', 'task_level', 'composite_id', 'user_id', 'created_at', 'task_status',
+           'closed_at', 'version')
+
+
+def _columns() -> list[sa.Column]:
+    return [sa.Column('task_id', db.schemas.GUID(), nullable=False),
+            sa.Column('task_description', sa.Text(), nullable=False),
+            sa.Column('task_level', tasklevel, nullable=False),
+            sa.Column('composite_id', db.schemas.GUID(), nullable=True),
+            sa.Column('user_id', db.schemas.GUID(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('task_status', activeobject, nullable=False),
+            sa.Column('closed_at', sa.DateTime(), nullable=True),
+            sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False)]
+
+
+def _foreign_keys() -> list[sa.ForeignKeyConstraint]:
+    return [sa.ForeignKeyConstraint(['composite_id'], ['composites.composite_id'],
+                                    name=op.f('fk_tasks_composite_id_composites')),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], name=op.f('fk_tasks_user_id_users'))]
+
+
+def _create_indexes() -> None:
+    # created on the parent, so every partition gets its own copy
+    op.create_index('ix_tasks_user_id_created_at', 'tasks', ['user_id', 'created_at', 'task_id'], unique=False)
+    op.create_index('ix_tasks_composite_id_created_at', 'tasks', ['composite_id', 'created_at', 'task_id'],
+                    unique=False)
+    op.create_index('ix_tasks_user_id_active', 'tasks', ['user_id'], unique=False,
+                    postgresql_where=sa.text("task_status = 'active'"))
+
+
+def _copy_into(target: str) -> None:
+    columns = ', '.join(COLUMNS)
+    op.execute(f'INSERT INTO {target} ({columns}) SELECT {columns} FROM tasks')
+    op.drop_table('tasks')
+    op.rename_table(target, 'tasks')
+    op.execute(f'ALTER TABLE tasks RENAME CONSTRAINT pk_{target} TO pk_tasks')
+
+
+def upgrade() -> None:
+    # the primary key has to carry the partition key; task_id stays unique because it is a uuid4
+    op.create_table('tasks_partitioned', *_columns(),
+                    sa.PrimaryKeyConstraint('task_id', 'task_status', name='pk_tasks_partitioned'),
+                    *_foreign_keys(),
+                    postgresql_partition_by='LIST (task_status)')
+    # one partition per status that exists, read from the enum itself; a status added later
+    # lands in tasks_default until a migration splits it out
+    op.execute("""
+        DO $$
+        DECLARE status activeobject;
+        BEGIN
+            FOREACH status IN ARRAY enum_range(NULL::activeobject) LOOP
+                EXECUTE format('CREATE TABLE tasks_%s PARTITION OF tasks_partitioned FOR VALUES IN (%L)',
+                               status, status);
+            END LOOP;
+        END $$
+    """)
+    op.execute('CREATE TABLE tasks_default PARTITION OF tasks_partitioned DEFAULT')
+    _copy_into('tasks_partitioned')
+    _create_indexes()
+    op.execute('ANALYZE tasks')
+
+
+def downgrade() -> None:
+    op.create_table('tasks_unpartitioned', *_columns(),
+                    sa.PrimaryKeyConstraint('task_id', name='pk_tasks_unpartitioned'),
+                    *_foreign_keys())
+    # dropping the partitioned parent drops its partitions and their indexes with it
+    _copy_into('tasks_unpartitioned')
+    _create_indexes()
+    op.execute('ANALYZE tasks')
@@ -0,0 +1,46 @@
+"""added generated search vectors to tasks and composites
+
+Revision ID: b6f2a8e4c931
+Revises: 4e9b1d7c3a58
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f2a8e4c931'
+down_revision: Union[str, None] = '4e9b1d7c3a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# must match db.schemas.SEARCH_CONFIG
+SEARCH_CONFIG = 'simple'
+
+
+def upgrade() -> None:
+    # stored generated columns rewrite both tables once; on tasks it cascades to every partition
+    op.add_column('tasks', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                     sa.Computed(f"to_tsvector('{SEARCH_CONFIG}', task_description)",
+                                                 persisted=True),
+                                     nullable=True))
+    op.add_column('composites', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                          sa.Computed(f"setweight(to_tsvector('{SEARCH_CONFIG}', composite_name), 'A') "
+                                                      f"|| setweight(to_tsvector('{SEARCH_CONFIG}', "
+                                                      f"coalesce(composite_description, '')), 'B')",
+                                                      persisted=True),
+                                          nullable=True))
+    op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_composites_search_vector', 'composites', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_composites_search_vector', table_name='composites')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.drop_column('composites', 'search_vector')
+    op.drop_column('tasks', 'search_vector')
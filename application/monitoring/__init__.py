@@ -0,0 +1,18 @@
+__all__ = ("registry",
+           "Counter",
+           "Gauge",
+           "Histogram",
+           "MetricsMiddleware",
+           "InstrumentedAsyncQueuePool",
+           "instrument_engine",
+           "StatementAccountingMiddleware",
+           "StatementBudgetExceeded",
+           "instrument_statements",
+           "setup_logging"
+           )
+
+from .metrics import registry, Counter, Gauge, Histogram
+from .middleware import MetricsMiddleware
+from .pool import InstrumentedAsyncQueuePool, instrument_engine
+from .statements import StatementAccountingMiddleware, StatementBudgetExceeded, instrument_statements
+from .log_pipeline import setup_logging
@@ -0,0 +1,16 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class StatementBudgetConfig(BaseSettings):
+    enabled: bool = True
+    default_budget: int = 10
+    # route template -> max statements, e.g. {"/api/v1/user/": 4}
+    route_budgets: dict[str, int] = {}
+    repeat_threshold: int = 5
+    # test mode: raise inside the offending request instead of logging a warning
+    raise_on_violation: bool = False
+
+    model_config = SettingsConfigDict(env_prefix="SQL_BUDGET_")
+
+
+statement_budget_config = StatementBudgetConfig()
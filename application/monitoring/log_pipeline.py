@@ -0,0 +1,133 @@
+import inspect
+import logging
+import queue
+import random
+import sys
+import threading
+import traceback
+from typing import BinaryIO
+
+import orjson
+from loguru import logger
+
+from log_config import LoggingConfig
+from .metrics import registry
+
+
+log_records_dropped = registry.counter("log_records_dropped_total", "Log records dropped because the queue was full.")
+
+_STOP = object()
+
+
+def _to_json(record: dict) -> bytes:
+    extra = dict(record["extra"])
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": extra.pop("logger_name", record["name"]),
+        "message": record["message"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    if extra:
+        payload["extra"] = extra
+    if record["exception"] is not None:
+        payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    return orjson.dumps(payload, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+class QueueSink:
+    """Loguru sink that only enqueues; a background thread serialises and writes.
+
+    The queue is bounded and ``put_nowait`` never waits, so a slow disk drops
+    records (counted on /metrics) instead of blocking the event loop.
+
+    """
+
+    def __init__(self, stream: BinaryIO, maxsize: int) -> None:
+        self._stream = stream
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        try:
+            self._queue.put_nowait(message.record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+    def _drain(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                break
+            try:
+                self._stream.write(_to_json(record))
+                if self._queue.empty():
+                    self._stream.flush()
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+        self._stream.flush()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class LevelAndSamplingFilter:
+
+    def __init__(self, config: LoggingConfig) -> None:
+        self.default_level = logger.level(config.level).no
+        # longest prefix first so "sqlalchemy.engine" wins over "sqlalchemy"
+        self.levels = sorted(((name, logger.level(level).no) for name, level in config.levels.items()),
+                             key=lambda item: len(item[0]), reverse=True)
+        self.sampling = config.sampling
+
+    def __call__(self, record: dict) -> bool:
+        name = record["extra"].get("logger_name") or record["name"] or ""
+        threshold = self.default_level
+        for prefix, level_no in self.levels:
+            if name == prefix or name.startswith(prefix + "."):
+                threshold = level_no
+                break
+        if record["level"].no < threshold:
+            return False
+        rate = self.sampling.get(record["extra"].get("event"))
+        return rate is None or random.random() < rate
+
+
+class InterceptHandler(logging.Handler):
+    """Routes stdlib logging (SQLAlchemy, uvicorn) into the loguru pipeline."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # walk past the logging module's frames so function/line name the stdlib caller, not emit()
+        frame, depth = inspect.currentframe(), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.bind(logger_name=record.name).opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def _stdlib_level(level: str) -> int:
+    return logging.getLevelNamesMapping().get(level.upper(), logging.DEBUG)
+
+
+def setup_logging(config: LoggingConfig) -> QueueSink:
+    stream = open(config.path, "ab") if config.path else sys.stdout.buffer
+    sink = QueueSink(stream, maxsize=config.queue_size)
+
+    logger.remove()
+    logger.add(sink, level=0, filter=LevelAndSamplingFilter(config), catch=False)
+
+    # stdlib levels gate record creation, so SQLAlchemy does not build statement logs nobody keeps
+    logging.basicConfig(handlers=[InterceptHandler()], level=_stdlib_level(config.level), force=True)
+    for name, level in config.levels.items():
+        logging.getLogger(name).setLevel(_stdlib_level(level))
+    return sink
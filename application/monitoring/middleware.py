@@ -0,0 +1,48 @@
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from .metrics import registry
+
+
+http_requests = registry.counter("http_requests_total", "HTTP responses by route and status.")
+http_request_duration = registry.histogram("http_request_duration_seconds", "HTTP request latency by route.")
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+
+def route_template(scope: Scope) -> str:
+    # the router stores the matched route on the shared scope; templates keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency, status counts and in-flight requests."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec(method=method)
+            route = route_template(scope)
+            http_request_duration.observe(elapsed, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=str(status_code))
@@ -0,0 +1,54 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .metrics import registry
+
+
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection (including connect).",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0))
+db_pool_checkouts = registry.counter("db_pool_checkouts_total", "Connections checked out of the pool.")
+db_pool_connects = registry.counter("db_pool_connections_created_total", "New DBAPI connections opened.")
+db_pool_invalidations = registry.counter("db_pool_invalidations_total", "Connections invalidated.")
+db_pool_checked_out = registry.gauge("db_pool_checked_out", "Connections currently checked out.")
+db_pool_size = registry.gauge("db_pool_size", "Configured pool_size.")
+db_pool_overflow = registry.gauge("db_pool_overflow_in_use", "Connections currently open beyond pool_size.")
+db_pool_max_overflow = registry.gauge("db_pool_max_overflow", "Configured max_overflow.")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started, pool=self.metrics_name)
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    pool = engine.sync_engine.pool
+    pool.metrics_name = name
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(pool=name)
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        db_pool_connects.inc(pool=name)
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        db_pool_invalidations.inc(pool=name)
+
+    db_pool_checked_out.set_function(pool.checkedout, pool=name)
+    db_pool_size.set_function(pool.size, pool=name)
+    db_pool_overflow.set_function(lambda: max(pool.overflow(), 0), pool=name)
+    db_pool_max_overflow.set(pool._max_overflow, pool=name)
@@ -0,0 +1,120 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import statement_budget_config, StatementBudgetConfig
+from .metrics import registry
+from .middleware import route_template
+
+
+db_statements_per_request = registry.histogram(
+    "db_statements_per_request", "SQL statements issued per HTTP request.",
+    buckets=(0, 1, 2, 3, 4, 5, 8, 10, 15, 20, 50, 100))
+db_statement_duration = registry.histogram("db_statement_duration_seconds", "SQL statement execution time.")
+db_statement_budget_violations = registry.counter(
+    "db_statement_budget_violations_total", "Requests exceeding their statement budget or repeating a statement.")
+
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement text with parameters and expanded IN lists collapsed, so repeats compare equal."""
+    normalized = _PARAMETER_LIST.sub("(?)", _PARAMETER.sub("?", statement))
+    return " ".join(normalized.split())
+
+
+class StatementBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class RequestStatements:
+    scope: Scope
+    count: int = 0
+    duration: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    violations: list[str] = field(default_factory=list)
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+current_statements: ContextVar[RequestStatements | None] = ContextVar("current_statements", default=None)
+
+
+def _check_budget(stats: RequestStatements, statement_fingerprint: str, config: StatementBudgetConfig) -> None:
+    budget = config.route_budgets.get(stats.route, config.default_budget)
+    violation = None
+    if stats.count == budget + 1:
+        violation = f"{stats.route} issued more than {budget} statements"
+    elif stats.fingerprints[statement_fingerprint] == config.repeat_threshold:
+        violation = (f"{stats.route} repeated a statement {config.repeat_threshold} times "
+                     f"(possible N+1): {statement_fingerprint[:200]}")
+    if violation is None:
+        return
+    stats.violations.append(violation)
+    if config.raise_on_violation:
+        raise StatementBudgetExceeded(violation)
+
+
+def instrument_statements(engine: AsyncEngine, config: StatementBudgetConfig = statement_budget_config) -> None:
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_statements.get()
+        if stats is not None:
+            stats.count += 1
+            statement_fingerprint = fingerprint(statement)
+            stats.fingerprints[statement_fingerprint] += 1
+            _check_budget(stats, statement_fingerprint, config)
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+        db_statement_duration.observe(elapsed)
+        stats = current_statements.get()
+        if stats is not None:
+            stats.duration += elapsed
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        started = exception_context.connection.info.get("statement_started") \
+            if exception_context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class StatementAccountingMiddleware:
+    """Tags every statement with the request that issued it and enforces per-route budgets."""
+
+    def __init__(self, app: ASGIApp, config: StatementBudgetConfig = statement_budget_config) -> None:
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStatements(scope=scope)
+        token = current_statements.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_statements.reset(token)
+            db_statements_per_request.observe(stats.count, route=stats.route)
+            if stats.violations:
+                db_statement_budget_violations.inc(route=stats.route)
+                logger.bind(event="sql_budget").warning(
+                    "SQL budget: {} ({} statements, {:.1f}ms): {}",
+                    stats.route, stats.count, stats.duration * 1000, "; ".join(stats.violations))
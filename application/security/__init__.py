@@ -1,5 +1,14 @@
-__all__ = ("create_access_token", "create_refresh_token", "jwt_config")
+__all__ = ("create_access_token",
+           "create_refresh_token",
+           "decode_jwt",
+           "sign_token",
+           "token_codec",
+           "TokenError",
+           "TokenExpired",
+           "jwt_config",
+           "RateLimitMiddleware")
 
-from .jwt import create_access_token
-from .jwt import create_refresh_token
-from .jwt_config import jwt_config
\ No newline at end of file
+from .codecs import TokenError, TokenExpired
+from .jwt import create_access_token, create_refresh_token, decode_jwt, sign_token, token_codec
+from .jwt_config import jwt_config
+from .ratelimit import RateLimitMiddleware
@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any
+
+
+ASYMMETRIC_ALGORITHMS = frozenset({"ES256", "ES384", "ES512", "EdDSA", "RS256", "RS384", "RS512"})
+
+
+class TokenError(Exception):
+    """Token is malformed, has a bad signature or fails claim checks."""
+
+
+class TokenExpired(TokenError):
+    """Token signature is valid but ``exp`` is in the past."""
+
+
+class TokenCodec(ABC):
+    """Signs and verifies JWTs with one algorithm; parsed keys are built once per codec."""
+
+    name: str
+
+    def __init__(self, algorithm: str, secret_key: str | None = None,
+                 private_key: str | None = None, public_key: str | None = None) -> None:
+        self.algorithm = algorithm
+        self.asymmetric = algorithm in ASYMMETRIC_ALGORITHMS
+        if self.asymmetric and not (private_key and public_key):
+            raise ValueError(f"{algorithm} needs PRIVATE_KEY and PUBLIC_KEY")
+        if not self.asymmetric and not secret_key:
+            raise ValueError(f"{algorithm} needs SECRET_KEY")
+        self._signing_material = private_key if self.asymmetric else secret_key
+        self._verifying_material = public_key if self.asymmetric else secret_key
+
+    @abstractmethod
+    def encode(self, claims: dict[str, Any]) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict[str, Any]:
+        ...
+
+
+class JoseCodec(TokenCodec):
+    name = "jose"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        from jose.constants import ALGORITHMS
+        if self.algorithm not in ALGORITHMS.SUPPORTED:
+            raise ValueError(f"python-jose does not support {self.algorithm}")
+
+    @cached_property
+    def _signing_key(self):
+        from jose import jwk
+        return jwk.construct(self._signing_material, self.algorithm)
+
+    @cached_property
+    def _verifying_key(self):
+        from jose import jwk
+        return jwk.construct(self._verifying_material, self.algorithm)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        from jose import jwt
+        return jwt.encode(claims=claims, key=self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        from jose import jwt, JWTError, ExpiredSignatureError
+        try:
+            return jwt.decode(token=token, key=self._verifying_key, algorithms=[self.algorithm])
+        except ExpiredSignatureError as error:
+            raise TokenExpired(str(error)) from error
+        except JWTError as error:
+            raise TokenError(str(error)) from error
+
+
+class PyJWTCodec(TokenCodec):
+    """PyJWT backend: HMAC through the stdlib, ES256/EdDSA through ``cryptography``.
+
+    Needs the optional ``pyjwt`` extra: ``poetry install --extras pyjwt``.
+    """
+
+    name = "pyjwt"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        from jwt.algorithms import get_default_algorithms
+        algorithms = get_default_algorithms()
+        if self.algorithm not in algorithms:
+            raise ValueError(f"PyJWT does not support {self.algorithm}")
+        self._algorithm = algorithms[self.algorithm]
+
+    @cached_property
+    def _signing_key(self):
+        return self._algorithm.prepare_key(self._signing_material)
+
+    @cached_property
+    def _verifying_key(self):
+        return self._algorithm.prepare_key(self._verifying_material)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        import jwt
+        return jwt.encode(payload=claims, key=self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        import jwt
+        try:
+            return jwt.decode(jwt=token, key=self._verifying_key, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError as error:
+            raise TokenExpired(str(error)) from error
+        except jwt.InvalidTokenError as error:
+            raise TokenError(str(error)) from error
+
+
+CODECS: dict[str, type[TokenCodec]] = {codec.name: codec for codec in (JoseCodec, PyJWTCodec)}
+
+
+def build_codec(backend: str, algorithm: str, secret_key: str | None = None,
+                private_key: str | None = None, public_key: str | None = None) -> TokenCodec:
+    try:
+        codec_class = CODECS[backend]
+    except KeyError:
+        raise ValueError(f"unknown token backend {backend!r}, expected one of {sorted(CODECS)}") from None
+    return codec_class(algorithm, secret_key=secret_key, private_key=private_key, public_key=public_key)
@@ -1,51 +1,78 @@
+import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
 
 from datetime import timedelta, datetime, timezone
-from typing import Optional
-
-from jose import jwt
+from typing import Any, Callable, Optional
 
+from .codecs import TokenCodec, build_codec
 from .jwt_config import jwt_config
 
 
+token_codec = build_codec(backend=jwt_config.BACKEND,
+                          algorithm=jwt_config.ALGORITHM,
+                          secret_key=jwt_config.SECRET_KEY,
+                          private_key=jwt_config.PRIVATE_KEY,
+                          public_key=jwt_config.PUBLIC_KEY)
+
+_signing_executor = ThreadPoolExecutor(max_workers=jwt_config.SIGNING_WORKERS, thread_name_prefix="jwt-sign")
+
+
 def encode_jwt(data: dict,
                expire_minutes: int = jwt_config.ACCESS_TOKEN_EXPIRE,
-               expire_timedelta: Optional[timedelta] = None) -> str:
+               expire_timedelta: Optional[timedelta] = None,
+               codec: TokenCodec | None = None) -> str:
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
     if expire_timedelta:
-        expire = datetime.now(timezone.utc) + expire_timedelta
+        expire = now + expire_timedelta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=expire_minutes)
-    to_encode.update(exp=expire, iat=now, jti=str(uuid.uuid4()))
-    encoded_jwt = jwt.encode(claims=to_encode, key=jwt_config.SECRET_KEY, algorithm=jwt_config.ALGORITHM)
-    return encoded_jwt
+        expire = now + timedelta(minutes=expire_minutes)
+    to_encode.update(exp=int(expire.timestamp()), iat=int(now.timestamp()), jti=str(uuid.uuid4()))
+    return (codec or token_codec).encode(to_encode)
+
+
+def decode_jwt(token: str, codec: TokenCodec | None = None) -> dict[str, Any]:
+    """Verify ``token``; raises ``TokenExpired`` or ``TokenError``."""
+    return (codec or token_codec).decode(token)
 
 
 def create_jwt(token_type: str,
                jwt_data: dict,
                expire_minutes: int = jwt_config.ACCESS_TOKEN_EXPIRE,
-               expire_timedelta: timedelta | None = None) -> str:
+               expire_timedelta: timedelta | None = None,
+               codec: TokenCodec | None = None) -> str:
 
     jwt_payload = {jwt_config.type.TOKEN_TYPE_FIELD: token_type}
     jwt_payload.update(jwt_data)
     return encode_jwt(data=jwt_payload,
                       expire_minutes=expire_minutes,
-                      expire_timedelta=expire_timedelta)
+                      expire_timedelta=expire_timedelta,
+                      codec=codec)
 
 
-def create_access_token(user_id: UUID) -> str:
+def create_access_token(user_id: UUID, codec: TokenCodec | None = None) -> str:
     jwt_payload = {
         "sub": str(user_id)
     }
     return create_jwt(token_type=jwt_config.type.ACCESS_TOKEN_TYPE, jwt_data=jwt_payload,
-                      expire_minutes=jwt_config.ACCESS_TOKEN_EXPIRE)
+                      expire_minutes=jwt_config.ACCESS_TOKEN_EXPIRE, codec=codec)
 
 
-def create_refresh_token(user_id: UUID) -> str:
+def create_refresh_token(user_id: UUID, codec: TokenCodec | None = None) -> str:
     jwt_payload = {
         "sub": str(user_id)
     }
     return create_jwt(token_type=jwt_config.type.REFRESH_TOKEN_TYPE, jwt_data=jwt_payload,
-                      expire_timedelta=timedelta(days=jwt_config.REFRESH_TOKEN_EXPIRE))
+                      expire_timedelta=timedelta(days=jwt_config.REFRESH_TOKEN_EXPIRE), codec=codec)
+
+
+async def sign_token(create_token: Callable[[UUID], str], user_id: UUID) -> str:
+    """Run ``create_access_token``/``create_refresh_token`` without blocking the event loop.
+
+    HMAC signing takes microseconds and stays inline; ES256/EdDSA signing goes to a thread.
+    """
+    if not token_codec.asymmetric:
+        return create_token(user_id)
+    return await asyncio.get_running_loop().run_in_executor(_signing_executor, create_token, user_id)
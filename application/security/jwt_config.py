@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +12,13 @@ class TokenType(BaseSettings):
 class TokenConfig(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # "pyjwt" needs `poetry install --extras pyjwt`; "jose" cannot do EdDSA
+    BACKEND: Literal["jose", "pyjwt"] = "jose"
+    # PEM keys for ES256 / EdDSA, SECRET_KEY is only used by HMAC algorithms
+    PRIVATE_KEY: str | None = None
+    PUBLIC_KEY: str | None = None
+    # threads that sign asymmetric tokens off the event loop
+    SIGNING_WORKERS: int = 4
     ACCESS_TOKEN_EXPIRE: int = 30
     REFRESH_TOKEN_EXPIRE: int = 30
 
@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app_config import app_config, RateLimitSettings
+from monitoring import registry
+from .codecs import TokenError
+from .jwt import decode_jwt
+
+
+rate_limited_requests = registry.counter("rate_limited_requests_total", "Requests rejected by the rate limiter.")
+
+_TOKEN_COOKIES = ("xww-access-cookie", "xws-security-cookie")
+
+
+class TokenBucketLimiter:
+    """Token buckets spread over lock-striped shards.
+
+    Buckets refill lazily when touched, so idle keys cost nothing; each
+    shard is an LRU and drops its least recently used bucket when full.
+    A dropped bucket comes back full, which only ever errs on the lenient side.
+
+    """
+
+    def __init__(self, shards: int, max_buckets: int) -> None:
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._shard_size = max(1, max_buckets // shards)
+
+    def acquire(self, key: tuple, rate: float, burst: int) -> float:
+        """Take one token; returns 0 on success, otherwise seconds until a token is available."""
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                tokens = float(burst)
+            else:
+                tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                buckets.move_to_end(key)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            buckets[key] = (tokens - 1 if wait == 0.0 else tokens, now)
+            while len(buckets) > self._shard_size:
+                buckets.popitem(last=False)
+        return wait
+
+
+class RateLimitMiddleware:
+    """Rejects requests over their route's limit with 429 before any handler, dependency or session runs."""
+
+    def __init__(self, app: ASGIApp, settings: RateLimitSettings = app_config.rate_limit) -> None:
+        self.app = app
+        self.settings = settings
+        self.limiter = TokenBucketLimiter(shards=settings.SHARDS, max_buckets=settings.MAX_BUCKETS)
+
+    def _client_key(self, scope: Scope, by_ip: bool = False) -> str:
+        headers = Headers(scope=scope)
+        cookie_header = headers.get("cookie")
+        # a token minted for one throwaway account must not buy a fresh bucket on the unauthenticated routes
+        if cookie_header and not by_ip:
+            cookies = cookie_parser(cookie_header)
+            for name in _TOKEN_COOKIES:
+                if name not in cookies:
+                    continue
+                try:
+                    return f"user:{decode_jwt(cookies[name])['sub']}"
+                except (TokenError, KeyError):
+                    continue
+        if self.settings.TRUST_FORWARDED_FOR and "x-forwarded-for" in headers:
+            return f"ip:{headers['x-forwarded-for'].split(',')[0].strip()}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.settings.ROUTES.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None or not self.settings.ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.acquire((scope["path"], self._client_key(scope, limit.BY_IP)),
+                                    rate=limit.RATE, burst=limit.BURST)
+        if wait:
+            rate_limited_requests.inc(route=scope["path"])
+            response = JSONResponse({"detail": "Too Many Requests"}, status_code=429,
+                                    headers={"Retry-After": str(math.ceil(wait))})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import uuid
+
+import psycopg
+import pytest
+from pydantic import ValidationError
+
+# the suite signs its own tokens and mints one pair per test; everything else comes from the DB_* settings
+os.environ.setdefault("SECRET_KEY", "tests-only-secret")
+os.environ.setdefault("RATE_LIMIT", '{"ENABLED": false}')
+# the app's JSON logs go to the temp dir rather than into the working tree
+os.environ.setdefault("LOG_PATH", os.path.join(tempfile.gettempdir(), "application-tests.log"))
+
+
+def _postgres_error() -> str | None:
+    try:
+        from db_config import db_url_config
+    except ValidationError as error:
+        return f"DB_* settings are missing: {error.error_count()} errors"
+    try:
+        psycopg.connect(host=db_url_config.DB_HOST, port=db_url_config.DB_PORT, user=db_url_config.DB_USER,
+                        password=db_url_config.DB_PASS, dbname=db_url_config.DB_NAME, connect_timeout=3).close()
+    except psycopg.Error as error:
+        return f"no Postgres reachable: {error}"
+    return None
+
+
+@pytest.fixture(scope="session")
+def postgres() -> None:
+    """Skips the requesting test unless a migrated Postgres is reachable with the DB_* settings."""
+    error = _postgres_error()
+    if error is not None:
+        pytest.skip(error)
+
+
+@pytest.fixture(scope="module")
+def client(postgres):
+    from fastapi.testclient import TestClient
+    from main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def user(client):
+    """A fresh user whose tokens are set on ``client``; removed with everything it owns afterwards."""
+    from sqlalchemy import delete, select
+    from db import db_helper, DALUser, User, Composite, Task, PortalRoles
+
+    async def create() -> User:
+        async with db_helper.session_factory() as session:
+            async with session.begin():
+                return await DALUser(session).create_user(phone_number=f"test-{uuid.uuid4()}", first_name="Test",
+                                                          last_name="User", roles=[PortalRoles.ROLE_PORTAL_USER])
+
+    async def remove(user_id: uuid.UUID) -> None:
+        async with db_helper.session_factory() as session:
+            async with session.begin():
+                composite_ids = select(Composite.composite_id).where(Composite.user_id == user_id)
+                await session.execute(delete(Task).where((Task.user_id == user_id)
+                                                         | Task.composite_id.in_(composite_ids)))
+                await session.execute(delete(Composite).where(Composite.user_id == user_id))
+                await session.execute(delete(User).where(User.user_id == user_id))
+
+    created = client.portal.call(create)
+    client.cookies.clear()
+    assert client.post("/api/v1/auth/get-token", params={"user_id": str(created.user_id)}).status_code == 200
+    # resolves the principal once, so the counted requests all hit the principal cache
+    assert client.get("/api/v1/task/list").status_code == 200
+    yield created
+    client.portal.call(remove, created.user_id)
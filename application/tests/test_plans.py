@@ -0,0 +1,37 @@
+"""`python -m benchmarks plans` as a test: no benchmark case may plan a Seq Scan on the hot tables.
+
+The first run seeds a dataset large enough for the planner to prefer the indexes; later runs reuse it.
+"""
+from sqlalchemy import select, text
+
+
+async def _seeded_sample():
+    from db import db_helper, AuthUser
+    from benchmarks.cases import load_sample
+    from benchmarks.seed import PHONE_PREFIX, seed, is_seeded
+
+    if not await is_seeded():
+        await seed(users=2_000, composites_per_user=3, tasks_per_user=20, auth_pairs=2_000, batch_size=5_000)
+    async with db_helper.session_factory() as session:
+        has_pairs = (await session.execute(
+            select(AuthUser.auth_id).where(AuthUser.phone_number.like(f"{PHONE_PREFIX}%")).limit(1))).first()
+    if has_pairs is None:
+        # the app's sweep drops expired verification pairs, so they may be gone since the dataset was seeded
+        await seed(users=0, composites_per_user=0, tasks_per_user=0, auth_pairs=2_000, batch_size=5_000)
+    async with db_helper.engine.connect() as connection:
+        await connection.execute(text("ANALYZE"))
+        await connection.commit()
+    return await load_sample(200)
+
+
+async def _problems() -> list[str]:
+    from benchmarks.plans import check_plans
+
+    return await check_plans(await _seeded_sample())
+
+
+def test_no_seq_scans(client):
+    # runs on the client's event loop, which owns the engine's pooled connections
+    problems = client.portal.call(_problems)
+
+    assert problems == [], "\n".join(problems)
@@ -0,0 +1,98 @@
+"""Exact SQL statement count per endpoint, read from the per-request accounting in monitoring.statements.
+
+A relationship that goes back to eager loading by default, or a handler that
+starts loading more than its profile, changes a count here and fails the run.
+"""
+import re
+
+import pytest
+
+
+_SUM = re.compile(r'^db_statements_per_request_sum\{route="(?P<route>[^"]+)"\} (?P<value>\S+)$', re.M)
+
+
+def _statement_sums(client) -> dict[str, float]:
+    return {match["route"]: float(match["value"]) for match in _SUM.finditer(client.get("/metrics").text)}
+
+
+def counted(client, method: str, url: str, **kwargs):
+    """Send one request and return it with the number of statements its route issued."""
+    before = _statement_sums(client)
+    response = client.request(method, url, **kwargs)
+    after = _statement_sums(client)
+    route = url.split("?")[0]
+    return response, int(after.get(route, 0) - before.get(route, 0))
+
+
+def _composite(client, tasks: int = 2) -> str:
+    composite = client.post("/api/v1/composite/", json={"composite_name": "groceries",
+                                                        "composite_description": "weekly run"})
+    composite_id = composite.json()["composite_id"]
+    for number in range(tasks):
+        client.post("/api/v1/task/", json={"task_description": f"buy item {number}", "task_level": "free",
+                                           "composite_id": composite_id})
+    return composite_id
+
+
+def _task(client) -> str:
+    return client.post("/api/v1/task/", json={"task_description": "call the dentist",
+                                              "task_level": "urgent"}).json()["task_id"]
+
+
+# (method, url, request kwargs built from the fixture ids, expected status, expected statements)
+ENDPOINTS = {
+    "get user": ("GET", "/api/v1/user/", lambda ids: {"params": {"user_id": ids["user"]}}, 200, 5),
+    "patch user": ("PATCH", "/api/v1/user/",
+                   lambda ids: {"params": {"user_id": ids["user"]}, "json": {"first_name": "Renamed"}}, 200, 2),
+    "create composite": ("POST", "/api/v1/composite/",
+                         lambda ids: {"json": {"composite_name": "trip", "composite_description": "packing"}},
+                         201, 1),
+    "get composite": ("GET", "/api/v1/composite/", lambda ids: {"params": {"composite_id": ids["composite"]}},
+                      200, 3),
+    "get composite with archive": ("GET", "/api/v1/composite/",
+                                   lambda ids: {"params": {"composite_id": ids["composite"],
+                                                           "include_archived": True}}, 200, 5),
+    "list composites": ("GET", "/api/v1/composite/list", lambda ids: {}, 200, 1),
+    "composite summary": ("GET", "/api/v1/composite/summary", lambda ids: {}, 200, 1),
+    "patch composite": ("PATCH", "/api/v1/composite/",
+                        lambda ids: {"params": {"composite_id": ids["composite"]}, "json": {"composite_name": "x"}},
+                        200, 2),
+    "close composite": ("POST", "/api/v1/composite/close",
+                        lambda ids: {"params": {"composite_id": ids["composite"], "cascade": True}}, 200, 1),
+    "delete composite": ("DELETE", "/api/v1/composite/",
+                         lambda ids: {"params": {"composite_id": ids["empty_composite"]}}, 200, 1),
+    "create task": ("POST", "/api/v1/task/", lambda ids: {"json": {"task_description": "water plants",
+                                                                   "task_level": "optimal"}}, 201, 1),
+    "get task": ("GET", "/api/v1/task/", lambda ids: {}, 200, 2),
+    "list tasks": ("GET", "/api/v1/task/list", lambda ids: {}, 200, 1),
+    "list tasks with archive": ("GET", "/api/v1/task/list", lambda ids: {"params": {"include_archived": True}},
+                                200, 1),
+    "patch task": ("PATCH", "/api/v1/task/",
+                   lambda ids: {"params": {"task_id": ids["task"]}, "json": {"task_level": "free"}}, 200, 1),
+    "close task": ("POST", "/api/v1/task/close", lambda ids: {"params": {"task_id": ids["task"]}}, 200, 1),
+    "delete task": ("DELETE", "/api/v1/task/", lambda ids: {"params": {"task_id": ids["task"]}}, 200, 1),
+    "bulk create tasks": ("POST", "/api/v1/task/bulk",
+                          lambda ids: {"json": {"tasks": [{"task_description": f"bulk {number}", "task_level": "free",
+                                                           "composite_id": ids["composite"]}
+                                                          for number in range(5)]}}, 200, 3),
+    "bulk close tasks": ("POST", "/api/v1/task/bulk/close", lambda ids: {"json": {"task_ids": ids["composite_tasks"]}},
+                         200, 2),
+    "bulk patch tasks": ("PATCH", "/api/v1/task/bulk",
+                         lambda ids: {"json": {"task_ids": ids["composite_tasks"], "task_level": "urgent"}}, 200, 2),
+    "search": ("GET", "/api/v1/search/", lambda ids: {"params": {"q": "buy"}}, 200, 1),
+}
+
+
+@pytest.mark.parametrize("name", ENDPOINTS)
+def test_statement_count(client, user, name):
+    method, url, build_kwargs, status, expected = ENDPOINTS[name]
+    composite_id = _composite(client)
+    composite_tasks = [task["task_id"] for task in client.get("/api/v1/task/list",
+                                                               params={"composite_id": composite_id}).json()["items"]]
+    ids = {"user": str(user.user_id), "composite": composite_id, "composite_tasks": composite_tasks,
+           "empty_composite": _composite(client, tasks=0), "task": _task(client)}
+
+    response, statements = counted(client, method, url, **build_kwargs(ids))
+
+    assert response.status_code == status, response.text
+    assert statements == expected